@@ -34,6 +34,21 @@ def create_app(config_name=None):
     csrf.init_app(app)
     migrate.init_app(app, db)
     
+    # Build the encryption service once per app (key parsing and derivation included)
+    if app.config.get('ENCRYPTION_KEY'):
+        from services.encryption_service import EncryptionService
+        app.extensions['encryption'] = EncryptionService(app.config['ENCRYPTION_KEY'])
+    
+    # Background audit log writer (optional)
+    if app.config.get('AUDIT_QUEUE_ENABLED'):
+        from services.audit_queue import AuditQueue
+        AuditQueue(app)
+    
+    # Background notification sender (optional)
+    if app.config.get('TASK_QUEUE_ENABLED'):
+        from services.task_queue import TaskQueue
+        TaskQueue(app)
+    
     # Ensure upload directories exist
     upload_folder = app.config['UPLOAD_FOLDER']
     os.makedirs(os.path.join(upload_folder, 'id_photos'), exist_ok=True)
@@ -129,6 +144,32 @@ def register_cli_commands(app):
         from services.cleanup_service import purge_inactive_accounts
         count = purge_inactive_accounts(months)
         click.echo(f'Purged {count} inactive accounts.')
+    
+    @app.cli.command('reencrypt-data')
+    def reencrypt_data():
+        """Re-encrypt legacy Fernet recipient fields and move address and notes into contact_encrypted."""
+        from models.recipient import Recipient
+        from services.encryption_service import get_encryption_service
+    
+        encryption_service = get_encryption_service()
+        count = 0
+    
+        for recipient in Recipient.query.all():
+            if encryption_service.is_legacy(recipient.phone_encrypted):
+                phone = encryption_service.decrypt(recipient.phone_encrypted)
+                if phone is not None:
+                    recipient.phone_encrypted = encryption_service.encrypt(phone)
+                    count += 1
+            
+            # Rows still holding address and notes in the separate columns
+            if recipient.address_encrypted not in ('[PURGED]', Recipient.CONTACT_MARKER):
+                address, notes = recipient.get_contact(encryption_service)
+                if address is not None:
+                    recipient.set_contact(address, notes, encryption_service)
+                    count += 1
+    
+        db.session.commit()
+        click.echo(f'Updated {count} encrypted fields.')
 
 
 # Create app instance for running directly
@@ -9,6 +9,8 @@ from models.audit import AuditLog
 from services.audit_service import AuditService
 from services.cleanup_service import delete_volunteer_id_uploads
 from services.encryption_service import get_encryption_service
+from services.notification_service import NotificationService
+from services.task_queue import enqueue
 from flask import send_from_directory
 
 
@@ -166,13 +168,10 @@ def volunteer_approve(id):
     
     # Audit log
     AuditService.log_volunteer_approved(volunteer.id, current_user.id)
+    db.session.commit()
     
     # Send notification to volunteer
-    try:
-        from services.notification_service import NotificationService
-        NotificationService.notify_volunteer_approved(volunteer)
-    except Exception as e:
-        current_app.logger.error(f"Failed to send approval notification: {e}")
+    enqueue(NotificationService.send_volunteer_review, volunteer.id, 'approved')
     
     flash(f'{volunteer.full_name} has been approved.', 'success')
     return redirect(url_for('admin.volunteer_list', status='pending'))
@@ -198,13 +197,10 @@ def volunteer_reject(id):
     
     # Audit log
     AuditService.log_volunteer_rejected(volunteer.id, current_user.id, reason)
+    db.session.commit()
     
     # Send notification to volunteer
-    try:
-        from services.notification_service import NotificationService
-        NotificationService.notify_volunteer_rejected(volunteer, reason)
-    except Exception as e:
-        current_app.logger.error(f"Failed to send rejection notification: {e}")
+    enqueue(NotificationService.send_volunteer_review, volunteer.id, 'rejected', reason)
     
     flash(f'{volunteer.full_name} has been rejected.', 'info')
     return redirect(url_for('admin.volunteer_list', status='pending'))
@@ -263,11 +259,7 @@ def volunteer_suspend(id):
     db.session.commit()
     
     # Send notification to volunteer
-    try:
-        from services.notification_service import NotificationService
-        NotificationService.notify_volunteer_suspended(volunteer, reason)
-    except Exception as e:
-        current_app.logger.error(f"Failed to send suspension notification: {e}")
+    enqueue(NotificationService.send_volunteer_review, volunteer.id, 'suspended', reason)
     
     if released_count > 0:
         flash(f'{volunteer.full_name} has been suspended. {released_count} active delivery(ies) returned to the pool with high priority.', 'warning')
@@ -355,6 +347,7 @@ def recipient_detail(id):
     
     # Log admin viewing recipient
     AuditService.log_admin_viewed_recipient(current_user.id, recipient.id)
+    db.session.commit()
     
     encryption_service = get_encryption_service()
     
@@ -85,7 +85,6 @@ def send_message(delivery_id):
         content=content
     )
     db.session.add(message)
-    db.session.commit()
     
     # Determine volunteer and recipient IDs for audit
     volunteer_id = None
@@ -106,6 +105,8 @@ def send_message(delivery_id):
         recipient_id=recipient_id
     )
     
+    db.session.commit()
+    
     return jsonify({
         'message': message.to_dict()
     }), 201
@@ -32,12 +32,13 @@ def login():
                 return render_template('auth/login.html')
             
             login_user(user, remember=remember)
-            user.update_last_active()
             
-            # Log admin logins
+            # Log admin logins (committed with the last-active update below)
             if user.is_admin:
                 AuditService.log_admin_login(user.id)
             
+            user.update_last_active()
+            
             # Redirect to intended page or role-appropriate dashboard
             next_page = request.args.get('next')
             if next_page:
@@ -140,9 +141,9 @@ def register_recipient():
         encryption_service = get_encryption_service()
         recipient = Recipient(
             user_id=user.id,
-            display_name=display_name,
-            address_encrypted=encryption_service.encrypt(address)
+            display_name=display_name
         )
+        recipient.set_contact(address, notes, encryption_service)
         
         # Set fuzzy location for distance-based matching
         if latitude and longitude:
@@ -150,15 +151,15 @@ def register_recipient():
         
         if phone:
             recipient.phone_encrypted = encryption_service.encrypt(phone)
-        if notes:
-            recipient.notes_encrypted = encryption_service.encrypt(notes)
         
         db.session.add(recipient)
-        db.session.commit()
+        db.session.flush()  # Get recipient ID
         
         # Audit log
         AuditService.log_recipient_registered(recipient.id)
         
+        db.session.commit()
+        
         login_user(user)
         flash('Account created successfully. Please log in.', 'success')
         return redirect(url_for('auth.login'))
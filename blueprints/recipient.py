@@ -1,6 +1,7 @@
 from datetime import datetime
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required, current_user
+from sqlalchemy.orm import selectinload
 
 from app import db
 from models.delivery import Delivery
@@ -36,12 +37,16 @@ def dashboard():
     """Recipient dashboard - view active and past deliveries."""
     recipient = current_user.recipient_profile
     
-    active_deliveries = Delivery.query.filter(
+    active_deliveries = Delivery.query.options(
+        selectinload(Delivery.volunteer)
+    ).filter(
         Delivery.recipient_id == recipient.id,
         Delivery.status.in_(['open', 'claimed', 'picked_up'])
     ).order_by(Delivery.created_at.desc()).all()
     
-    past_deliveries = Delivery.query.filter(
+    past_deliveries = Delivery.query.options(
+        selectinload(Delivery.volunteer)
+    ).filter(
         Delivery.recipient_id == recipient.id,
         Delivery.status.in_(['completed', 'canceled'])
     ).order_by(Delivery.completed_at.desc()).limit(10).all()
@@ -240,6 +245,7 @@ def request_complete(id):
                 recipient.id,
                 score
             )
+            db.session.commit()
             flash('Thank you for your feedback!', 'success')
         except ValueError as e:
             flash(str(e), 'error')
@@ -310,18 +316,16 @@ def settings():
                 flash(error, 'error')
         else:
             recipient.display_name = display_name
-            recipient.set_address(address, encryption_service)
+            recipient.set_contact(address, notes, encryption_service)
             recipient.set_location(latitude, longitude)
             recipient.set_phone(phone, encryption_service)
-            recipient.set_notes(notes, encryption_service)
             
             db.session.commit()
             flash('Settings updated successfully.', 'success')
     
     # Decrypt current values for display
-    current_address = recipient.get_address(encryption_service)
+    current_address, current_notes = recipient.get_contact(encryption_service)
     current_phone = recipient.get_phone(encryption_service)
-    current_notes = recipient.get_notes(encryption_service)
     
     return render_template(
         'recipient/settings.html',
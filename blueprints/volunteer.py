@@ -2,6 +2,7 @@ import os
 from datetime import datetime
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
 from flask_login import login_required, current_user, login_user
+from sqlalchemy.orm import selectinload
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
 
@@ -182,11 +183,11 @@ def apply():
         id_upload = VolunteerIdUpload.create_for_volunteer(volunteer.id, id_path)
         db.session.add(id_upload)
         
-        db.session.commit()
-        
         # Audit log
         AuditService.log_volunteer_registered(volunteer.id)
         
+        db.session.commit()
+        
         # Auto-login and redirect to pending page
         login_user(user)
         flash('Application submitted successfully! Your application is under review.', 'success')
@@ -236,7 +237,9 @@ def dashboard():
     other_area_deliveries = total_open_deliveries - len(available_deliveries)
     
     # Get volunteer's active deliveries
-    active_deliveries = Delivery.query.filter(
+    active_deliveries = Delivery.query.options(
+        selectinload(Delivery.recipient)
+    ).filter(
         Delivery.volunteer_id == volunteer.id,
         Delivery.status.in_(['claimed', 'picked_up'])
     ).order_by(Delivery.pickup_time.asc()).all()
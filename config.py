@@ -1,9 +1,22 @@
 import os
 from dotenv import load_dotenv
+from sqlalchemy.pool import StaticPool
 
 load_dotenv()
 
 
+def _pool_options(database_uri):
+    """Connection pool settings for server databases (SQLite keeps SQLAlchemy's default pool)."""
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,  # Drop connections the server has closed
+        'pool_recycle': 1800    # Recycle before MySQL's wait_timeout
+    }
+
+
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-me')
@@ -30,6 +43,12 @@ class Config:
     MESSAGE_POLL_INTERVAL_SECONDS = 10
     INACTIVE_ACCOUNT_PURGE_MONTHS = 18
     
+    # Write non-critical audit entries from a background thread in batches
+    AUDIT_QUEUE_ENABLED = os.environ.get('AUDIT_QUEUE_ENABLED', 'False').lower() == 'true'
+    
+    # Send notification emails from a background thread instead of the request
+    TASK_QUEUE_ENABLED = os.environ.get('TASK_QUEUE_ENABLED', 'False').lower() == 'true'
+    
     # ===========================================
     # Service Area Configuration
     # ===========================================
@@ -50,7 +69,7 @@ class Config:
     
     # Place types we consider "grocery-like" (no confirmation needed)
     # See: https://developers.google.com/maps/documentation/places/web-service/supported_types
-    ACCEPTED_STORE_TYPES = {
+    ACCEPTED_STORE_TYPES = frozenset({
         'grocery_or_supermarket',
         'supermarket',
         'food',
@@ -61,7 +80,7 @@ class Config:
         'shopping_mall',  # Contains grocery stores
         'meal_delivery',
         'meal_takeaway',
-    }
+    })
     
     # ===========================================
     # Email Notifications (Resend)
@@ -78,6 +97,7 @@ class DevelopmentConfig(Config):
         'DATABASE_URL', 
         'sqlite:///community_delivery.db'  # SQLite for easier local dev
     )
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options(SQLALCHEMY_DATABASE_URI)
     SESSION_COOKIE_SECURE = False  # Allow HTTP in development
 
 
@@ -85,14 +105,22 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # One shared in-memory connection, so every app context and thread sees the same data
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False}
+    }
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
+    AUDIT_QUEUE_ENABLED = False
+    TASK_QUEUE_ENABLED = False
 
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options(SQLALCHEMY_DATABASE_URI)
     
     @classmethod
     def init_app(cls, app):
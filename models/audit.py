@@ -48,7 +48,7 @@ class AuditLog(db.Model):
     @classmethod
     def log(cls, action, volunteer_id=None, recipient_id=None, delivery_id=None,
             admin_id=None, details=None, ip_address=None):
-        """Create an audit log entry."""
+        """Create an audit log entry (added to the session; the caller commits)."""
         entry = cls(
             action=action,
             volunteer_id=volunteer_id,
@@ -59,7 +59,6 @@ class AuditLog(db.Model):
             ip_address=ip_address
         )
         db.session.add(entry)
-        db.session.commit()
         return entry
     
     @classmethod
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy.orm import contains_eager
 
 from app import db
 
@@ -42,6 +43,18 @@ class Delivery(db.Model):
     # Priority for re-queued deliveries
     priority = db.Column(db.Integer, default=0, index=True)  # Higher = shows first
     
+    __table_args__ = (
+        # Service-area bounding box lookups
+        db.Index('ix_deliveries_store_location', 'store_latitude', 'store_longitude'),
+        # Open deliveries in display order (partial where supported; MySQL indexes all rows)
+        db.Index(
+            'ix_deliveries_open_priority',
+            status, priority.desc(), created_at,
+            postgresql_where=(status == 'open'),
+            sqlite_where=(status == 'open')
+        ),
+    )
+    
     # Relationships
     messages = db.relationship('Message', backref='delivery', lazy='dynamic', cascade='all, delete-orphan')
     rating = db.relationship('Rating', backref='delivery', uselist=False, cascade='all, delete-orphan')
@@ -174,41 +187,58 @@ class Delivery(db.Model):
             # Volunteer hasn't set up service area yet
             return []
         
-        # Get all open deliveries
-        open_deliveries = cls.query.filter(cls.status == 'open').all()
+        center_lat = float(volunteer.service_center_lat)
+        center_lng = float(volunteer.service_center_lng)
+        radius = volunteer.service_radius_miles
         
-        # Filter by distance to both store and recipient
-        available = []
-        for delivery in open_deliveries:
-            # Check store distance
-            if delivery.store_latitude and delivery.store_longitude:
-                store_distance = GeocodingService.calculate_distance(
-                    float(volunteer.service_center_lat),
-                    float(volunteer.service_center_lng),
-                    float(delivery.store_latitude),
-                    float(delivery.store_longitude)
+        # Narrow open deliveries in SQL to stores and recipients inside the
+        # service area's bounding box (a missing location doesn't exclude)
+        min_lat, max_lat, min_lng, max_lng = GeocodingService.bounding_box(center_lat, center_lng, radius)
+        open_deliveries = cls.query.join(Recipient).options(
+            contains_eager(cls.recipient)
+        ).filter(
+            cls.status == 'open',
+            db.or_(
+                cls.store_latitude.is_(None),
+                cls.store_longitude.is_(None),
+                db.and_(
+                    cls.store_latitude.between(min_lat, max_lat),
+                    cls.store_longitude.between(min_lng, max_lng)
                 )
-                if store_distance > volunteer.service_radius_miles:
-                    continue
-            
-            # Check recipient distance
-            recipient = delivery.recipient
-            if recipient.latitude and recipient.longitude:
-                recipient_distance = GeocodingService.calculate_distance(
-                    float(volunteer.service_center_lat),
-                    float(volunteer.service_center_lng),
-                    float(recipient.latitude),
-                    float(recipient.longitude)
+            ),
+            db.or_(
+                Recipient.latitude.is_(None),
+                Recipient.longitude.is_(None),
+                db.and_(
+                    Recipient.latitude.between(min_lat, max_lat),
+                    Recipient.longitude.between(min_lng, max_lng)
                 )
-                if recipient_distance > volunteer.service_radius_miles:
-                    continue
-            
-            available.append(delivery)
+            )
+        ).order_by(
+            # Priority (descending) then created_at (ascending)
+            cls.priority.desc(),
+            cls.created_at
+        ).all()
         
-        # Sort by priority (descending) then created_at (ascending)
-        available.sort(key=lambda d: (-d.priority, d.created_at))
+        # Filter by exact distance to both store and recipient, in one batch each
+        store_distances = GeocodingService.calculate_distances(center_lat, center_lng, [
+            (float(d.store_latitude), float(d.store_longitude))
+            if d.store_latitude and d.store_longitude else None
+            for d in open_deliveries
+        ])
+        recipient_distances = GeocodingService.calculate_distances(center_lat, center_lng, [
+            (float(d.recipient.latitude), float(d.recipient.longitude))
+            if d.recipient.latitude and d.recipient.longitude else None
+            for d in open_deliveries
+        ])
         
-        return available
+        return [
+            delivery
+            for delivery, store_distance, recipient_distance
+            in zip(open_deliveries, store_distances, recipient_distances)
+            if (store_distance is None or store_distance <= radius)
+            and (recipient_distance is None or recipient_distance <= radius)
+        ]
     
     def __repr__(self):
         return f'<Delivery {self.id} ({self.status})>'
@@ -1,19 +1,27 @@
+import json
 from datetime import datetime
 from flask import current_app
+from sqlalchemy import func, insert, literal, select
 
 from app import db
+from utils.geo import fuzz_coordinates
 
 
 class Recipient(db.Model):
     """Recipient profile with encrypted sensitive data."""
     __tablename__ = 'recipients'
     
+    # Stored in address_encrypted once address and notes live in contact_encrypted
+    CONTACT_MARKER = '[CONTACT]'
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
     display_name = db.Column(db.String(100), nullable=False)
     address_encrypted = db.Column(db.Text, nullable=False)
     phone_encrypted = db.Column(db.String(255), nullable=True)
     notes_encrypted = db.Column(db.Text, nullable=True)  # Delivery instructions
+    # Address and notes sealed together so both decrypt in one pass (null on older rows)
+    contact_encrypted = db.Column(db.Text, nullable=True)
     
     # Fuzzy location for distance-based matching (2 decimal places ≈ 0.7 mile accuracy)
     # This allows geographic queries without exposing exact address
@@ -23,6 +31,11 @@ class Recipient(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     deleted_at = db.Column(db.DateTime, nullable=True, index=True)
     
+    __table_args__ = (
+        # Service-area bounding box lookups
+        db.Index('ix_recipients_location', 'latitude', 'longitude'),
+    )
+    
     # Relationships
     deliveries = db.relationship('Delivery', backref='recipient', lazy='dynamic')
     ratings_given = db.relationship('Rating', backref='recipient', lazy='dynamic')
@@ -31,24 +44,44 @@ class Recipient(db.Model):
     def is_deleted(self):
         return self.deleted_at is not None
     
+    def get_contact(self, encryption_service):
+        """Decrypt and return (address, notes)."""
+        if self.contact_encrypted:
+            contact = encryption_service.decrypt(self.contact_encrypted)
+            if contact is not None:
+                contact = json.loads(contact)
+                return contact['address'], contact['notes']
+        
+        # Rows written before the combined field existed
+        if self.address_encrypted in ('[PURGED]', self.CONTACT_MARKER):
+            address = None
+        else:
+            address = encryption_service.decrypt(self.address_encrypted)
+        notes = encryption_service.decrypt(self.notes_encrypted) if self.notes_encrypted else None
+        return address, notes
+    
+    def set_contact(self, address, notes, encryption_service):
+        """Encrypt and store address and delivery notes as one value."""
+        self.contact_encrypted = self.seal_contact(address, notes, encryption_service)
+        self.address_encrypted = self.CONTACT_MARKER
+        self.notes_encrypted = None
+    
+    @staticmethod
+    def seal_contact(address, notes, encryption_service):
+        """Encrypt address and notes as one combined value."""
+        return encryption_service.encrypt(json.dumps({'address': address, 'notes': notes or None}))
+    
     def get_address(self, encryption_service):
         """Decrypt and return address."""
-        if self.address_encrypted == '[PURGED]':
-            return None
-        return encryption_service.decrypt(self.address_encrypted)
+        return self.get_contact(encryption_service)[0]
     
     def set_address(self, address, encryption_service):
-        """Encrypt and store address."""
-        self.address_encrypted = encryption_service.encrypt(address)
+        """Encrypt and store address, keeping the current notes."""
+        self.set_contact(address, self.get_notes(encryption_service), encryption_service)
     
     def set_location(self, latitude, longitude):
         """Store fuzzy location (rounded to 2 decimal places for privacy)."""
-        if latitude is not None and longitude is not None:
-            self.latitude = round(float(latitude), 2)
-            self.longitude = round(float(longitude), 2)
-        else:
-            self.latitude = None
-            self.longitude = None
+        self.latitude, self.longitude = fuzz_coordinates(latitude, longitude)
     
     def get_phone(self, encryption_service):
         """Decrypt and return phone."""
@@ -65,16 +98,11 @@ class Recipient(db.Model):
     
     def get_notes(self, encryption_service):
         """Decrypt and return delivery notes."""
-        if not self.notes_encrypted:
-            return None
-        return encryption_service.decrypt(self.notes_encrypted)
+        return self.get_contact(encryption_service)[1]
     
     def set_notes(self, notes, encryption_service):
-        """Encrypt and store delivery notes."""
-        if notes:
-            self.notes_encrypted = encryption_service.encrypt(notes)
-        else:
-            self.notes_encrypted = None
+        """Encrypt and store delivery notes, keeping the current address."""
+        self.set_contact(self.get_address(encryption_service), notes, encryption_service)
     
     @property
     def active_delivery(self):
@@ -97,29 +125,58 @@ class RecipientTombstone(db.Model):
     deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     @classmethod
-    def create_from_recipient(cls, recipient):
-        """Create tombstone from a recipient being deleted."""
+    def bulk_create_from_ids(cls, recipient_ids, deleted_at=None):
+        """
+        Create tombstones for recipients being deleted with one INSERT ... SELECT,
+        so the database builds the rows without loading recipients into Python.
+        deleted_at defaults to the current UTC time.
+        """
         from models.delivery import Delivery
+        from models.user import User
+        
+        if not recipient_ids:
+            return
         
-        # Get all volunteer IDs who interacted with this recipient
-        volunteer_ids = db.session.query(Delivery.volunteer_id).filter(
-            Delivery.recipient_id == recipient.id,
+        if deleted_at is None:
+            deleted_at = datetime.utcnow()
+        
+        # Each volunteer who interacted with these recipients, once per recipient
+        pairs = select(Delivery.recipient_id, Delivery.volunteer_id).where(
+            Delivery.recipient_id.in_(recipient_ids),
             Delivery.volunteer_id.isnot(None)
-        ).distinct().all()
-        volunteer_ids = [v[0] for v in volunteer_ids]
+        ).distinct().subquery()
+        
+        # Aggregate them into a JSON array per recipient
+        volunteer_ids = select(
+            func.coalesce(_json_array_agg(pairs.c.volunteer_id), '[]')
+        ).where(pairs.c.recipient_id == Recipient.id).scalar_subquery()
         
-        last_active = recipient.user.last_active or recipient.created_at
+        rows = select(
+            Recipient.id,
+            volunteer_ids,
+            func.date(func.coalesce(User.last_active, Recipient.created_at)),
+            literal(deleted_at, db.DateTime)
+        ).join(User, Recipient.user_id == User.id).where(Recipient.id.in_(recipient_ids))
         
-        tombstone = cls(
-            id=recipient.id,
-            volunteer_ids=volunteer_ids,
-            last_active_date=last_active.date()
+        db.session.execute(
+            insert(cls).from_select(
+                ['id', 'volunteer_ids', 'last_active_date', 'deleted_at'], rows
+            )
         )
-        return tombstone
     
     def __repr__(self):
         return f'<RecipientTombstone {self.id}>'
 
 
+def _json_array_agg(column):
+    """JSON array aggregate for the current database dialect (callers pass distinct rows)."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return func.json_agg(column)
+    if dialect == 'mysql':
+        return func.json_arrayagg(column)
+    return func.json_group_array(column)
+
+
 # Import at bottom to avoid circular imports
 from models.delivery import Delivery
@@ -30,10 +30,12 @@ CREATE TABLE recipients (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL UNIQUE,
     display_name VARCHAR(100) NOT NULL,  -- Can be alias/first name only
-    address_encrypted TEXT NOT NULL,      -- Fernet-encrypted full address
+    address_encrypted TEXT NOT NULL,      -- Encrypted full address on older rows; '[CONTACT]' once in contact_encrypted
     phone_encrypted VARCHAR(255) NULL,    -- Fernet-encrypted phone (optional)
     general_area VARCHAR(100) NULL,       -- Non-sensitive area for matching (e.g., "North Sacramento")
     notes TEXT NULL,                       -- Delivery instructions (gate codes, etc.) - encrypted
+    contact_encrypted TEXT NULL,          -- Address and notes encrypted together (NULL on older rows;
+                                          -- existing databases: ALTER TABLE recipients ADD COLUMN contact_encrypted TEXT NULL)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     deleted_at TIMESTAMP NULL,            -- Soft delete for retention policy
     
@@ -338,7 +340,8 @@ BEGIN
     SET r.deleted_at = NOW(),
         r.address_encrypted = '[PURGED]',
         r.phone_encrypted = NULL,
-        r.notes = NULL
+        r.notes = NULL,
+        r.contact_encrypted = NULL
     WHERE u.last_active < cutoff_date
       AND r.deleted_at IS NULL;
 END//
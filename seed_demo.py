@@ -8,7 +8,7 @@ Run with: python seed_demo.py
 import os
 import sys
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash
+from sqlalchemy import insert
 
 # Ensure we can import from the app
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -19,7 +19,21 @@ from models.recipient import Recipient
 from models.volunteer import Volunteer
 from models.delivery import Delivery
 from models.rating import Rating
-from services.encryption_service import EncryptionService
+
+
+def insert_returning_ids(model, rows):
+    """Bulk insert rows and return their generated primary keys, in row order."""
+    if db.engine.dialect.insert_returning:
+        return list(db.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            rows
+        ))
+    
+    # MySQL has no INSERT ... RETURNING; add the objects and collect the ids with one flush
+    objs = [model(**row) for row in rows]
+    db.session.add_all(objs)
+    db.session.flush()
+    return [obj.id for obj in objs]
 
 
 def seed_demo_data():
@@ -35,21 +49,15 @@ def seed_demo_data():
         
         print("Seeding demo data...")
         
+        # Imported here so the "already seeded" path skips them
+        from werkzeug.security import generate_password_hash
+        from services.encryption_service import EncryptionService
+        
         # Initialize encryption service
         encryption_service = EncryptionService()
         
-        # ===========================================
-        # ADMIN USER
-        # ===========================================
-        admin = User(
-            email='admin@demo.aquiestamos.org',
-            password_hash=generate_password_hash('demo2025'),
-            role='admin',
-            is_active=True
-        )
-        db.session.add(admin)
-        db.session.flush()
-        print(f"  Created admin: {admin.email}")
+        # All demo accounts share one password, so hash it once
+        demo_password_hash = generate_password_hash('demo2025')
         
         # ===========================================
         # VOLUNTEERS
@@ -90,36 +98,6 @@ def seed_demo_data():
             }
         ]
         
-        volunteer_objects = []
-        for v_data in volunteers_data:
-            user = User(
-                email=v_data['email'],
-                password_hash=generate_password_hash('demo2025'),
-                role='volunteer',
-                is_active=True
-            )
-            db.session.add(user)
-            db.session.flush()
-            
-            volunteer = Volunteer(
-                user_id=user.id,
-                full_name=v_data['full_name'],
-                service_center_address=v_data['service_center_address'],
-                service_center_lat=v_data['service_center_lat'],
-                service_center_lng=v_data['service_center_lng'],
-                service_radius_miles=v_data['service_radius_miles'],
-                status=v_data['status'],
-                attestation_completed=True,
-                total_deliveries=v_data['total_deliveries'],
-                average_rating=v_data['average_rating'],
-                reviewed_by=admin.id if v_data['status'] == 'approved' else None,
-                reviewed_at=datetime.utcnow() - timedelta(days=30) if v_data['status'] == 'approved' else None
-            )
-            db.session.add(volunteer)
-            db.session.flush()
-            volunteer_objects.append(volunteer)
-            print(f"  Created volunteer: {v_data['full_name']} ({v_data['status']})")
-        
         # ===========================================
         # RECIPIENTS
         # ===========================================
@@ -155,33 +133,70 @@ def seed_demo_data():
             }
         ]
         
-        recipient_objects = []
+        # ===========================================
+        # USERS (admin, volunteers, recipients)
+        # ===========================================
+        # Insert every account in one statement; RETURNING hands back the
+        # generated IDs in parameter order, so no per-row flush is needed.
+        users_data = (
+            [{'email': 'admin@demo.aquiestamos.org', 'role': 'admin'}] +
+            [{'email': v_data['email'], 'role': 'volunteer'} for v_data in volunteers_data] +
+            [{'email': r_data['email'], 'role': 'recipient'} for r_data in recipients_data]
+        )
+        user_ids = insert_returning_ids(User, [
+            {
+                'email': u_data['email'],
+                'password_hash': demo_password_hash,
+                'role': u_data['role'],
+                'is_active': True
+            }
+            for u_data in users_data
+        ])
+        admin_id = user_ids[0]
+        volunteer_user_ids = user_ids[1:1 + len(volunteers_data)]
+        recipient_user_ids = user_ids[1 + len(volunteers_data):]
+        print(f"  Created admin: {users_data[0]['email']}")
+        
+        # ===========================================
+        # VOLUNTEER PROFILES
+        # ===========================================
+        reviewed_at = datetime.utcnow() - timedelta(days=30)
+        volunteer_ids = insert_returning_ids(Volunteer, [
+            {
+                'user_id': user_id,
+                'full_name': v_data['full_name'],
+                'service_center_address': v_data['service_center_address'],
+                'service_center_lat': v_data['service_center_lat'],
+                'service_center_lng': v_data['service_center_lng'],
+                'service_radius_miles': v_data['service_radius_miles'],
+                'status': v_data['status'],
+                'attestation_completed': True,
+                'total_deliveries': v_data['total_deliveries'],
+                'average_rating': v_data['average_rating'],
+                'reviewed_by': admin_id if v_data['status'] == 'approved' else None,
+                'reviewed_at': reviewed_at if v_data['status'] == 'approved' else None
+            }
+            for user_id, v_data in zip(volunteer_user_ids, volunteers_data)
+        ])
+        for v_data in volunteers_data:
+            print(f"  Created volunteer: {v_data['full_name']} ({v_data['status']})")
+        
+        # ===========================================
+        # RECIPIENT PROFILES
+        # ===========================================
+        recipient_ids = insert_returning_ids(Recipient, [
+            {
+                'user_id': user_id,
+                'display_name': r_data['display_name'],
+                'address_encrypted': Recipient.CONTACT_MARKER,
+                'phone_encrypted': encryption_service.encrypt(r_data['phone']),
+                'contact_encrypted': Recipient.seal_contact(r_data['address'], r_data['notes'], encryption_service),
+                'latitude': r_data['latitude'],
+                'longitude': r_data['longitude']
+            }
+            for user_id, r_data in zip(recipient_user_ids, recipients_data)
+        ])
         for r_data in recipients_data:
-            user = User(
-                email=r_data['email'],
-                password_hash=generate_password_hash('demo2025'),
-                role='recipient',
-                is_active=True
-            )
-            db.session.add(user)
-            db.session.flush()
-            
-            recipient = Recipient(
-                user_id=user.id,
-                display_name=r_data['display_name'],
-                address_encrypted=encryption_service.encrypt(r_data['address']),
-                latitude=r_data['latitude'],
-                longitude=r_data['longitude']
-            )
-            
-            if r_data['phone']:
-                recipient.phone_encrypted = encryption_service.encrypt(r_data['phone'])
-            if r_data['notes']:
-                recipient.notes_encrypted = encryption_service.encrypt(r_data['notes'])
-            
-            db.session.add(recipient)
-            db.session.flush()
-            recipient_objects.append(recipient)
             print(f"  Created recipient: {r_data['display_name']}")
         
         # ===========================================
@@ -192,8 +207,8 @@ def seed_demo_data():
         deliveries_data = [
             # Open delivery - available to claim
             {
-                'recipient': recipient_objects[0],
-                'volunteer': None,
+                'recipient_id': recipient_ids[0],
+                'volunteer_id': None,
                 'store_name': 'Safeway - Arden Way',
                 'pickup_address': '2501 Arden Way, Sacramento, CA 95825',
                 'store_lat': 38.6018,
@@ -205,8 +220,8 @@ def seed_demo_data():
             },
             # Another open delivery
             {
-                'recipient': recipient_objects[2],
-                'volunteer': None,
+                'recipient_id': recipient_ids[2],
+                'volunteer_id': None,
                 'store_name': 'Walmart - Elk Grove',
                 'pickup_address': '8465 Elk Grove Blvd, Elk Grove, CA 95758',
                 'store_lat': 38.4085,
@@ -218,8 +233,8 @@ def seed_demo_data():
             },
             # Claimed delivery - in progress
             {
-                'recipient': recipient_objects[1],
-                'volunteer': volunteer_objects[0],  # Carlos
+                'recipient_id': recipient_ids[1],
+                'volunteer_id': volunteer_ids[0],  # Carlos
                 'store_name': 'Target - South Sacramento',
                 'pickup_address': '7500 Stockton Blvd, Sacramento, CA 95823',
                 'store_lat': 38.4847,
@@ -232,8 +247,8 @@ def seed_demo_data():
             },
             # Completed delivery (yesterday)
             {
-                'recipient': recipient_objects[0],
-                'volunteer': volunteer_objects[1],  # Sarah
+                'recipient_id': recipient_ids[0],
+                'volunteer_id': volunteer_ids[1],  # Sarah
                 'store_name': 'Costco - Sacramento',
                 'pickup_address': '3360 El Camino Ave, Sacramento, CA 95821',
                 'store_lat': 38.6173,
@@ -248,8 +263,8 @@ def seed_demo_data():
             },
             # Another completed delivery (last week)
             {
-                'recipient': recipient_objects[1],
-                'volunteer': volunteer_objects[0],  # Carlos
+                'recipient_id': recipient_ids[1],
+                'volunteer_id': volunteer_ids[0],  # Carlos
                 'store_name': 'Raley\'s - Land Park',
                 'pickup_address': '5150 Freeport Blvd, Sacramento, CA 95822',
                 'store_lat': 38.5328,
@@ -264,50 +279,48 @@ def seed_demo_data():
             }
         ]
         
-        delivery_objects = []
+        delivery_ids = insert_returning_ids(Delivery, [
+            {
+                'recipient_id': d_data['recipient_id'],
+                'volunteer_id': d_data['volunteer_id'],
+                'store_name': d_data['store_name'],
+                'pickup_address': d_data['pickup_address'],
+                'store_latitude': d_data['store_lat'],
+                'store_longitude': d_data['store_lng'],
+                'order_name': d_data['order_name'],
+                'pickup_time': d_data['pickup_time'],
+                'estimated_items': d_data['estimated_items'],
+                'status': d_data['status'],
+                'claimed_at': d_data.get('claimed_at'),
+                'picked_up_at': d_data.get('picked_up_at'),
+                'completed_at': d_data.get('completed_at')
+            }
+            for d_data in deliveries_data
+        ])
         for d_data in deliveries_data:
-            delivery = Delivery(
-                recipient_id=d_data['recipient'].id,
-                volunteer_id=d_data['volunteer'].id if d_data['volunteer'] else None,
-                store_name=d_data['store_name'],
-                pickup_address=d_data['pickup_address'],
-                store_latitude=d_data['store_lat'],
-                store_longitude=d_data['store_lng'],
-                order_name=d_data['order_name'],
-                pickup_time=d_data['pickup_time'],
-                estimated_items=d_data['estimated_items'],
-                status=d_data['status'],
-                claimed_at=d_data.get('claimed_at'),
-                picked_up_at=d_data.get('picked_up_at'),
-                completed_at=d_data.get('completed_at')
-            )
-            db.session.add(delivery)
-            db.session.flush()
-            delivery_objects.append(delivery)
             print(f"  Created delivery: {d_data['store_name']} ({d_data['status']})")
         
         # ===========================================
         # RATINGS (for completed deliveries)
         # ===========================================
-        # Rating for Costco delivery
-        rating1 = Rating(
-            delivery_id=delivery_objects[3].id,  # Costco delivery
-            volunteer_id=volunteer_objects[1].id,  # Sarah
-            recipient_id=recipient_objects[0].id,  # Maria
-            score=5,
-            comment='Very friendly and professional. Thank you so much!'
-        )
-        db.session.add(rating1)
-        
-        # Rating for Raley's delivery
-        rating2 = Rating(
-            delivery_id=delivery_objects[4].id,  # Raley's delivery
-            volunteer_id=volunteer_objects[0].id,  # Carlos
-            recipient_id=recipient_objects[1].id,  # José
-            score=5,
-            comment='Excellent service, arrived right on time.'
-        )
-        db.session.add(rating2)
+        db.session.execute(insert(Rating), [
+            # Rating for Costco delivery
+            {
+                'delivery_id': delivery_ids[3],  # Costco delivery
+                'volunteer_id': volunteer_ids[1],  # Sarah
+                'recipient_id': recipient_ids[0],  # Maria
+                'score': 5,
+                'comment': 'Very friendly and professional. Thank you so much!'
+            },
+            # Rating for Raley's delivery
+            {
+                'delivery_id': delivery_ids[4],  # Raley's delivery
+                'volunteer_id': volunteer_ids[0],  # Carlos
+                'recipient_id': recipient_ids[1],  # José
+                'score': 5,
+                'comment': 'Excellent service, arrived right on time.'
+            }
+        ])
         
         print("  Created ratings for completed deliveries")
         
@@ -1,17 +1,28 @@
 # Service layer initialization
-from services.encryption_service import EncryptionService
-from services.audit_service import AuditService
-from services.delivery_service import DeliveryService
-from services.geocoding_service import GeocodingService
-from services.cleanup_service import cleanup_expired_uploads, purge_inactive_accounts
-from services.notification_service import NotificationService
+# Services are imported on first access (PEP 562) so short-lived processes
+# such as CLI commands only pay for the services they actually use.
+import importlib
 
-__all__ = [
-    'EncryptionService',
-    'AuditService', 
-    'DeliveryService',
-    'GeocodingService',
-    'NotificationService',
-    'cleanup_expired_uploads',
-    'purge_inactive_accounts'
-]
+_LAZY_IMPORTS = {
+    'EncryptionService': 'services.encryption_service',
+    'AuditService': 'services.audit_service',
+    'DeliveryService': 'services.delivery_service',
+    'GeocodingService': 'services.geocoding_service',
+    'NotificationService': 'services.notification_service',
+    'cleanup_expired_uploads': 'services.cleanup_service',
+    'purge_inactive_accounts': 'services.cleanup_service'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
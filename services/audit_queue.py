@@ -0,0 +1,96 @@
+"""
+Background audit log writer.
+
+When AUDIT_QUEUE_ENABLED is set, non-critical audit entries are queued in
+process and written by a daemon thread in batches, so the audit INSERT and
+its commit are taken off the request path.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app import db
+from models.audit import AuditLog
+
+# Sentinel telling the worker to flush what it has and exit
+_STOP = object()
+
+
+class AuditQueue:
+    """In-process queue of audit entries, drained in batches by a worker thread."""
+
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL_SECONDS = 5
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register with the app and start the worker thread."""
+        self.app = app
+        app.extensions['audit_queue'] = self
+
+        self._thread = threading.Thread(target=self._run, name='audit-queue', daemon=True)
+        self._thread.start()
+
+        # Flush pending entries on interpreter shutdown (incl. SIGTERM from gunicorn)
+        atexit.register(self.stop)
+
+    def put(self, **fields):
+        """Queue an audit entry (same fields as AuditLog.log)."""
+        # Stamp now so the entry records when the action happened, not when it was written
+        fields.setdefault('timestamp', datetime.utcnow())
+        self._queue.put(fields)
+
+    def stop(self, timeout=10):
+        """Flush queued entries and stop the worker."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self):
+        """Block for the first entry, then collect until the batch is full or the interval ends."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.FLUSH_INTERVAL_SECONDS
+        while len(batch) < self.BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, rows):
+        """Write a batch of entries in one transaction."""
+        with self.app.app_context():
+            try:
+                # executemany of one INSERT; the driver batches it into multi-row VALUES
+                db.session.execute(insert(AuditLog), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Failed to write {len(rows)} audit entries: {e}")
@@ -1,6 +1,30 @@
-from flask import request
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import insert
+
+from app import db
 from models.audit import AuditLog
 
+# Action constants resolved once at import time
+_VOLUNTEER_REGISTERED = AuditLog.VOLUNTEER_REGISTERED
+_VOLUNTEER_APPROVED = AuditLog.VOLUNTEER_APPROVED
+_VOLUNTEER_REJECTED = AuditLog.VOLUNTEER_REJECTED
+_VOLUNTEER_SUSPENDED = AuditLog.VOLUNTEER_SUSPENDED
+_DELIVERY_CREATED = AuditLog.DELIVERY_CREATED
+_DELIVERY_CLAIMED = AuditLog.DELIVERY_CLAIMED
+_DELIVERY_CANCELED = AuditLog.DELIVERY_CANCELED
+_DELIVERY_PICKED_UP = AuditLog.DELIVERY_PICKED_UP
+_DELIVERY_COMPLETED = AuditLog.DELIVERY_COMPLETED
+_MESSAGE_SENT = AuditLog.MESSAGE_SENT
+_ADDRESS_ACCESSED = AuditLog.ADDRESS_ACCESSED
+_RATING_SUBMITTED = AuditLog.RATING_SUBMITTED
+_RECIPIENT_REGISTERED = AuditLog.RECIPIENT_REGISTERED
+_RECIPIENT_DELETED = AuditLog.RECIPIENT_DELETED
+_RECIPIENT_DATA_PURGED = AuditLog.RECIPIENT_DATA_PURGED
+_ADMIN_LOGIN = AuditLog.ADMIN_LOGIN
+_ADMIN_VIEWED_RECIPIENT = AuditLog.ADMIN_VIEWED_RECIPIENT
+
 
 class AuditService:
     """Centralized audit logging service."""
@@ -15,11 +39,24 @@ class AuditService:
             return request.remote_addr
         return None
     
+    @staticmethod
+    def _write(action, critical=False, **fields):
+        """
+        Write an audit entry, via the background queue when enabled unless critical.
+        
+        Synchronous entries join the current session; the caller commits.
+        """
+        audit_queue = current_app.extensions.get('audit_queue')
+        if audit_queue is not None and not critical:
+            audit_queue.put(action=action, **fields)
+            return None
+        return AuditLog.log(action=action, **fields)
+    
     @classmethod
     def log_volunteer_registered(cls, volunteer_id):
         """Log volunteer registration."""
-        return AuditLog.log(
-            action=AuditLog.VOLUNTEER_REGISTERED,
+        return cls._write(
+            action=_VOLUNTEER_REGISTERED,
             volunteer_id=volunteer_id,
             ip_address=cls.get_client_ip()
         )
@@ -27,8 +64,8 @@ class AuditService:
     @classmethod
     def log_volunteer_approved(cls, volunteer_id, admin_id):
         """Log volunteer approval."""
-        return AuditLog.log(
-            action=AuditLog.VOLUNTEER_APPROVED,
+        return cls._write(
+            action=_VOLUNTEER_APPROVED,
             volunteer_id=volunteer_id,
             admin_id=admin_id,
             ip_address=cls.get_client_ip()
@@ -37,8 +74,8 @@ class AuditService:
     @classmethod
     def log_volunteer_rejected(cls, volunteer_id, admin_id, reason=None):
         """Log volunteer rejection."""
-        return AuditLog.log(
-            action=AuditLog.VOLUNTEER_REJECTED,
+        return cls._write(
+            action=_VOLUNTEER_REJECTED,
             volunteer_id=volunteer_id,
             admin_id=admin_id,
             details={'reason': reason} if reason else None,
@@ -48,8 +85,8 @@ class AuditService:
     @classmethod
     def log_volunteer_suspended(cls, volunteer_id, admin_id, reason=None):
         """Log volunteer suspension."""
-        return AuditLog.log(
-            action=AuditLog.VOLUNTEER_SUSPENDED,
+        return cls._write(
+            action=_VOLUNTEER_SUSPENDED,
             volunteer_id=volunteer_id,
             admin_id=admin_id,
             details={'reason': reason} if reason else None,
@@ -59,8 +96,8 @@ class AuditService:
     @classmethod
     def log_delivery_created(cls, delivery_id, recipient_id):
         """Log new delivery request."""
-        return AuditLog.log(
-            action=AuditLog.DELIVERY_CREATED,
+        return cls._write(
+            action=_DELIVERY_CREATED,
             delivery_id=delivery_id,
             recipient_id=recipient_id,
             ip_address=cls.get_client_ip()
@@ -69,8 +106,8 @@ class AuditService:
     @classmethod
     def log_delivery_claimed(cls, delivery_id, volunteer_id, recipient_id):
         """Log delivery claim."""
-        return AuditLog.log(
-            action=AuditLog.DELIVERY_CLAIMED,
+        return cls._write(
+            action=_DELIVERY_CLAIMED,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -81,8 +118,8 @@ class AuditService:
     def log_delivery_canceled(cls, delivery_id, volunteer_id=None, recipient_id=None, 
                                canceled_by=None, reason=None):
         """Log delivery cancellation."""
-        return AuditLog.log(
-            action=AuditLog.DELIVERY_CANCELED,
+        return cls._write(
+            action=_DELIVERY_CANCELED,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -90,11 +127,34 @@ class AuditService:
             ip_address=cls.get_client_ip()
         )
     
+    @classmethod
+    def log_deliveries_canceled(cls, deliveries, recipient_id=None,
+                                canceled_by=None, reason=None, timestamp=None):
+        """Log cancellation of several deliveries in one INSERT.
+        
+        ``deliveries`` is a list of (delivery_id, volunteer_id) pairs. All
+        entries share one timestamp (defaults to now).
+        """
+        ip_address = cls.get_client_ip()
+        timestamp = timestamp or datetime.utcnow()
+        db.session.execute(insert(AuditLog), [
+            {
+                'action': _DELIVERY_CANCELED,
+                'delivery_id': delivery_id,
+                'volunteer_id': volunteer_id,
+                'recipient_id': recipient_id,
+                'details': {'canceled_by': canceled_by, 'reason': reason},
+                'ip_address': ip_address,
+                'timestamp': timestamp
+            }
+            for delivery_id, volunteer_id in deliveries
+        ])
+    
     @classmethod
     def log_delivery_picked_up(cls, delivery_id, volunteer_id, recipient_id):
         """Log groceries picked up from store."""
-        return AuditLog.log(
-            action=AuditLog.DELIVERY_PICKED_UP,
+        return cls._write(
+            action=_DELIVERY_PICKED_UP,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -104,8 +164,8 @@ class AuditService:
     @classmethod
     def log_delivery_completed(cls, delivery_id, volunteer_id, recipient_id):
         """Log delivery completion."""
-        return AuditLog.log(
-            action=AuditLog.DELIVERY_COMPLETED,
+        return cls._write(
+            action=_DELIVERY_COMPLETED,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -115,8 +175,8 @@ class AuditService:
     @classmethod
     def log_message_sent(cls, delivery_id, sender_id, volunteer_id=None, recipient_id=None):
         """Log message sent."""
-        return AuditLog.log(
-            action=AuditLog.MESSAGE_SENT,
+        return cls._write(
+            action=_MESSAGE_SENT,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -127,8 +187,9 @@ class AuditService:
     @classmethod
     def log_address_accessed(cls, delivery_id, volunteer_id, recipient_id):
         """Log when a volunteer accesses a recipient's address."""
-        return AuditLog.log(
-            action=AuditLog.ADDRESS_ACCESSED,
+        return cls._write(
+            action=_ADDRESS_ACCESSED,
+            critical=True,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -138,8 +199,8 @@ class AuditService:
     @classmethod
     def log_rating_submitted(cls, delivery_id, volunteer_id, recipient_id, score):
         """Log rating submission."""
-        return AuditLog.log(
-            action=AuditLog.RATING_SUBMITTED,
+        return cls._write(
+            action=_RATING_SUBMITTED,
             delivery_id=delivery_id,
             volunteer_id=volunteer_id,
             recipient_id=recipient_id,
@@ -150,8 +211,8 @@ class AuditService:
     @classmethod
     def log_recipient_registered(cls, recipient_id):
         """Log recipient registration."""
-        return AuditLog.log(
-            action=AuditLog.RECIPIENT_REGISTERED,
+        return cls._write(
+            action=_RECIPIENT_REGISTERED,
             recipient_id=recipient_id,
             ip_address=cls.get_client_ip()
         )
@@ -159,8 +220,8 @@ class AuditService:
     @classmethod
     def log_recipient_deleted(cls, recipient_id):
         """Log recipient account deletion."""
-        return AuditLog.log(
-            action=AuditLog.RECIPIENT_DELETED,
+        return cls._write(
+            action=_RECIPIENT_DELETED,
             recipient_id=recipient_id,
             ip_address=cls.get_client_ip()
         )
@@ -168,16 +229,25 @@ class AuditService:
     @classmethod
     def log_recipient_data_purged(cls, recipient_id):
         """Log recipient data purge (inactive account)."""
-        return AuditLog.log(
-            action=AuditLog.RECIPIENT_DATA_PURGED,
+        return cls._write(
+            action=_RECIPIENT_DATA_PURGED,
             recipient_id=recipient_id
         )
     
+    @classmethod
+    def log_recipients_data_purged(cls, recipient_ids, timestamp=None):
+        """Log data purge for a batch of recipients in one INSERT (one shared timestamp)."""
+        timestamp = timestamp or datetime.utcnow()
+        db.session.execute(insert(AuditLog), [
+            {'action': _RECIPIENT_DATA_PURGED, 'recipient_id': recipient_id, 'timestamp': timestamp}
+            for recipient_id in recipient_ids
+        ])
+    
     @classmethod
     def log_admin_login(cls, admin_id):
         """Log admin login."""
-        return AuditLog.log(
-            action=AuditLog.ADMIN_LOGIN,
+        return cls._write(
+            action=_ADMIN_LOGIN,
             admin_id=admin_id,
             ip_address=cls.get_client_ip()
         )
@@ -185,8 +255,8 @@ class AuditService:
     @classmethod
     def log_admin_viewed_recipient(cls, admin_id, recipient_id):
         """Log admin viewing recipient details."""
-        return AuditLog.log(
-            action=AuditLog.ADMIN_VIEWED_RECIPIENT,
+        return cls._write(
+            action=_ADMIN_VIEWED_RECIPIENT,
             admin_id=admin_id,
             recipient_id=recipient_id,
             ip_address=cls.get_client_ip()
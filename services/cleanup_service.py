@@ -1,6 +1,9 @@
+import calendar
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from functools import lru_cache
 from flask import current_app
+from sqlalchemy import select
 
 from app import db
 from models.volunteer import VolunteerIdUpload
@@ -8,25 +11,44 @@ from models.recipient import Recipient, RecipientTombstone
 from models.user import User
 from services.audit_service import AuditService
 
+# Number of recipients purged per transaction
+PURGE_BATCH_SIZE = 1000
+
+
+def _remove_upload_file(file_path):
+    """Delete an uploaded file; a file that is already gone is not an error."""
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        current_app.logger.error(f"Failed to delete file {file_path}: {e}")
+
+
+def _delete_upload_records(upload_ids):
+    """Delete upload rows by id with a single DELETE; returns the number removed."""
+    if not upload_ids:
+        return 0
+    return VolunteerIdUpload.query.filter(
+        VolunteerIdUpload.id.in_(upload_ids)
+    ).delete(synchronize_session=False)
+
 
 def cleanup_expired_uploads():
     """Remove expired ID upload files and database records."""
-    expired = VolunteerIdUpload.query.filter(
-        VolunteerIdUpload.expires_at < datetime.utcnow()
+    # Only the id and path are needed, so skip building ORM objects
+    expired = db.session.execute(
+        select(VolunteerIdUpload.id, VolunteerIdUpload.file_path).where(
+            VolunteerIdUpload.expires_at < datetime.utcnow()
+        )
     ).all()
     
-    count = 0
+    # Delete physical files if they exist
     for upload in expired:
-        # Delete physical file if it exists
-        if os.path.exists(upload.file_path):
-            try:
-                os.remove(upload.file_path)
-            except OSError as e:
-                current_app.logger.error(f"Failed to delete file {upload.file_path}: {e}")
-        
-        # Delete database record
-        db.session.delete(upload)
-        count += 1
+        _remove_upload_file(upload.file_path)
+    
+    # Delete database records
+    count = _delete_upload_records([upload.id for upload in expired])
     
     db.session.commit()
     current_app.logger.info(f"Cleaned up {count} expired ID uploads")
@@ -35,54 +57,81 @@ def cleanup_expired_uploads():
 
 def delete_volunteer_id_uploads(volunteer_id):
     """Delete all ID uploads for a volunteer (after review)."""
-    uploads = VolunteerIdUpload.query.filter(
-        VolunteerIdUpload.volunteer_id == volunteer_id
+    uploads = db.session.execute(
+        select(VolunteerIdUpload.id, VolunteerIdUpload.file_path).where(
+            VolunteerIdUpload.volunteer_id == volunteer_id
+        )
     ).all()
     
     for upload in uploads:
-        if os.path.exists(upload.file_path):
-            try:
-                os.remove(upload.file_path)
-            except OSError as e:
-                current_app.logger.error(f"Failed to delete file {upload.file_path}: {e}")
-        
-        db.session.delete(upload)
+        _remove_upload_file(upload.file_path)
+    
+    count = _delete_upload_records([upload.id for upload in uploads])
     
     db.session.commit()
-    return len(uploads)
+    return count
 
 
-def purge_inactive_accounts(months=None):
-    """Purge inactive recipient accounts per retention policy."""
+@lru_cache(maxsize=8)
+def _inactivity_cutoff(months, today):
+    """
+    Start of the day exactly ``months`` calendar months before ``today``.
+    
+    The day is clamped to the target month's length (e.g. Mar 31 - 1 month
+    is Feb 28/29). Cached per (months, day), so repeated sweeps in the same
+    day reuse the same cutoff.
+    """
+    year, month = divmod(today.year * 12 + (today.month - 1) - months, 12)
+    month += 1
+    day = min(today.day, calendar.monthrange(year, month)[1])
+    return datetime.combine(date(year, month, day), datetime.min.time())
+
+
+def purge_inactive_accounts(months=None, batch_size=PURGE_BATCH_SIZE):
+    """
+    Purge inactive recipient accounts per retention policy.
+    
+    Recipients are processed in chunks of ``batch_size`` IDs, each committed in
+    its own transaction, so memory and lock duration stay bounded no matter how
+    many accounts are eligible.
+    """
     if months is None:
         months = current_app.config.get('INACTIVE_ACCOUNT_PURGE_MONTHS', 18)
     
-    cutoff_date = datetime.utcnow() - timedelta(days=months * 30)
-    
-    # Find inactive recipients
-    inactive_recipients = db.session.query(Recipient).join(User).filter(
-        User.last_active < cutoff_date,
-        Recipient.deleted_at.is_(None)
-    ).all()
+    cutoff_date = _inactivity_cutoff(months, datetime.utcnow().date())
     
     count = 0
-    for recipient in inactive_recipients:
-        # Create tombstone for audit trail
-        tombstone = RecipientTombstone.create_from_recipient(recipient)
-        db.session.add(tombstone)
+    while True:
+        # Next window of inactive recipients (purged rows drop out of the filter)
+        ids = db.session.scalars(
+            select(Recipient.id).join(User).filter(
+                User.last_active < cutoff_date,
+                Recipient.deleted_at.is_(None)
+            ).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        
+        now = datetime.utcnow()
+        
+        # Create tombstones for audit trail
+        RecipientTombstone.bulk_create_from_ids(ids, deleted_at=now)
         
         # Soft delete and purge sensitive data
-        recipient.deleted_at = datetime.utcnow()
-        recipient.address_encrypted = '[PURGED]'
-        recipient.phone_encrypted = None
-        recipient.notes_encrypted = None
+        Recipient.query.filter(Recipient.id.in_(ids)).update({
+            Recipient.deleted_at: now,
+            Recipient.address_encrypted: '[PURGED]',
+            Recipient.phone_encrypted: None,
+            Recipient.notes_encrypted: None,
+            Recipient.contact_encrypted: None
+        }, synchronize_session=False)
         
         # Audit log
-        AuditService.log_recipient_data_purged(recipient.id)
+        AuditService.log_recipients_data_purged(ids, timestamp=now)
         
-        count += 1
+        db.session.commit()
+        count += len(ids)
     
-    db.session.commit()
     current_app.logger.info(f"Purged {count} inactive accounts")
     return count
 
@@ -94,15 +143,17 @@ def delete_recipient_account(recipient):
     # Force cancel any active deliveries
     DeliveryService.force_cancel_for_deletion(recipient)
     
+    now = datetime.utcnow()
+    
     # Create tombstone for audit trail
-    tombstone = RecipientTombstone.create_from_recipient(recipient)
-    db.session.add(tombstone)
+    RecipientTombstone.bulk_create_from_ids([recipient.id], deleted_at=now)
     
     # Soft delete and purge sensitive data
-    recipient.deleted_at = datetime.utcnow()
+    recipient.deleted_at = now
     recipient.address_encrypted = '[PURGED]'
     recipient.phone_encrypted = None
     recipient.notes_encrypted = None
+    recipient.contact_encrypted = None
     
     # Deactivate user account
     recipient.user.is_active = False
@@ -1,5 +1,7 @@
+from collections import defaultdict
 from datetime import datetime
 from flask import current_app
+from sqlalchemy import select
 
 from app import db
 from models.delivery import Delivery
@@ -8,6 +10,8 @@ from models.volunteer import Volunteer
 from services.audit_service import AuditService
 from services.encryption_service import get_encryption_service
 from services.geocoding_service import GeocodingService
+from services.notification_service import NotificationService
+from services.task_queue import enqueue
 
 
 class DeliveryService:
@@ -33,11 +37,13 @@ class DeliveryService:
             delivery.set_store_location(store_lat, store_lng, store_place_id)
         
         db.session.add(delivery)
-        db.session.commit()
+        db.session.flush()  # Get delivery ID
         
         # Audit log
         AuditService.log_delivery_created(delivery.id, recipient.id)
         
+        db.session.commit()
+        
         return delivery
     
     @staticmethod
@@ -60,33 +66,31 @@ class DeliveryService:
         
         # Verify delivery is still within volunteer's service area
         if volunteer.has_service_location:
+            center_lat = float(volunteer.service_center_lat)
+            center_lng = float(volunteer.service_center_lng)
+            radius = volunteer.service_radius_miles
+            min_lat, max_lat, min_lng, max_lng = GeocodingService.bounding_box(center_lat, center_lng, radius)
+            
+            def in_service_area(latitude, longitude):
+                # Anything outside the box is out of range; only points inside need the exact distance
+                if not (min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng):
+                    return False
+                return GeocodingService.calculate_distance(center_lat, center_lng, latitude, longitude) <= radius
+            
             # Check store distance
             if delivery.store_latitude and delivery.store_longitude:
-                store_distance = GeocodingService.calculate_distance(
-                    float(volunteer.service_center_lat),
-                    float(volunteer.service_center_lng),
-                    float(delivery.store_latitude),
-                    float(delivery.store_longitude)
-                )
-                if store_distance > volunteer.service_radius_miles:
+                if not in_service_area(float(delivery.store_latitude), float(delivery.store_longitude)):
                     raise ValueError("Store is outside your service area")
             
             # Check recipient distance
             recipient = delivery.recipient
             if recipient.latitude and recipient.longitude:
-                recipient_distance = GeocodingService.calculate_distance(
-                    float(volunteer.service_center_lat),
-                    float(volunteer.service_center_lng),
-                    float(recipient.latitude),
-                    float(recipient.longitude)
-                )
-                if recipient_distance > volunteer.service_radius_miles:
+                if not in_service_area(float(recipient.latitude), float(recipient.longitude)):
                     raise ValueError("Recipient is outside your service area")
         
         delivery.volunteer_id = volunteer.id
         delivery.status = 'claimed'
         delivery.claimed_at = datetime.utcnow()
-        db.session.commit()
         
         # Audit log
         AuditService.log_delivery_claimed(
@@ -95,12 +99,10 @@ class DeliveryService:
             delivery.recipient_id
         )
         
+        db.session.commit()
+        
         # Send notification to recipient
-        try:
-            from services.notification_service import NotificationService
-            NotificationService.notify_delivery_claimed(delivery)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send claim notification: {e}")
+        enqueue(NotificationService.send_delivery_update, delivery.id, 'claimed')
         
         return delivery
     
@@ -115,7 +117,6 @@ class DeliveryService:
         
         delivery.status = 'picked_up'
         delivery.picked_up_at = datetime.utcnow()
-        db.session.commit()
         
         # Audit log
         AuditService.log_delivery_picked_up(
@@ -124,12 +125,10 @@ class DeliveryService:
             delivery.recipient_id
         )
         
+        db.session.commit()
+        
         # Send notification to recipient
-        try:
-            from services.notification_service import NotificationService
-            NotificationService.notify_delivery_picked_up(delivery)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send pickup notification: {e}")
+        enqueue(NotificationService.send_delivery_update, delivery.id, 'picked_up')
         
         return delivery
     
@@ -148,8 +147,6 @@ class DeliveryService:
         # Update volunteer stats
         volunteer.total_deliveries += 1
         
-        db.session.commit()
-        
         # Audit log
         AuditService.log_delivery_completed(
             delivery.id,
@@ -157,12 +154,10 @@ class DeliveryService:
             delivery.recipient_id
         )
         
+        db.session.commit()
+        
         # Send notification to recipient
-        try:
-            from services.notification_service import NotificationService
-            NotificationService.notify_delivery_completed(delivery)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send completion notification: {e}")
+        enqueue(NotificationService.send_delivery_update, delivery.id, 'completed')
         
         return delivery
     
@@ -177,7 +172,6 @@ class DeliveryService:
         
         was_claimed = delivery.status in ['claimed', 'picked_up']
         volunteer_id = delivery.volunteer_id
-        volunteer = delivery.volunteer  # Get volunteer before clearing
         
         delivery.status = 'canceled'
         delivery.canceled_at = datetime.utcnow()
@@ -187,8 +181,6 @@ class DeliveryService:
         delivery.claimed_at = None
         delivery.picked_up_at = None
         
-        db.session.commit()
-        
         # Audit log
         AuditService.log_delivery_canceled(
             delivery.id,
@@ -198,13 +190,11 @@ class DeliveryService:
             reason=reason
         )
         
+        db.session.commit()
+        
         # Notify volunteer if delivery was claimed
-        if was_claimed and volunteer:
-            try:
-                from services.notification_service import NotificationService
-                NotificationService.notify_volunteer_delivery_canceled(volunteer, delivery, reason='recipient')
-            except Exception as e:
-                current_app.logger.error(f"Failed to send cancellation notification: {e}")
+        if was_claimed and volunteer_id:
+            enqueue(NotificationService.send_volunteer_delivery_canceled, volunteer_id, delivery.id, reason='recipient')
         
         return delivery
     
@@ -227,8 +217,6 @@ class DeliveryService:
         delivery.picked_up_at = None
         delivery.priority += 5
         
-        db.session.commit()
-        
         # Audit log
         AuditService.log_delivery_canceled(
             delivery.id,
@@ -238,6 +226,8 @@ class DeliveryService:
             reason=reason
         )
         
+        db.session.commit()
+        
         return delivery
     
     @staticmethod
@@ -251,6 +241,7 @@ class DeliveryService:
         
         recipient = delivery.recipient
         encryption_service = get_encryption_service()
+        address, notes = recipient.get_contact(encryption_service)
         
         # Audit log address access
         AuditService.log_address_accessed(
@@ -258,49 +249,71 @@ class DeliveryService:
             volunteer.id,
             recipient.id
         )
+        db.session.commit()
         
         return {
-            'address': recipient.get_address(encryption_service),
-            'notes': recipient.get_notes(encryption_service),
+            'address': address,
+            'notes': notes,
             'display_name': recipient.display_name
         }
     
     @staticmethod
     def force_cancel_for_deletion(recipient):
         """Force cancel any active deliveries for a recipient being deleted."""
-        active_deliveries = Delivery.query.filter(
-            Delivery.recipient_id == recipient.id,
-            Delivery.status.in_(['open', 'claimed', 'picked_up'])
+        # Capture what the audit log and notifications need before clearing volunteers
+        active_deliveries = db.session.execute(
+            select(
+                Delivery.id,
+                Delivery.volunteer_id,
+                Delivery.store_name,
+                Delivery.pickup_time
+            ).where(
+                Delivery.recipient_id == recipient.id,
+                Delivery.status.in_(['open', 'claimed', 'picked_up'])
+            )
         ).all()
         
+        if not active_deliveries:
+            return 0
+        
+        # One moment for the whole batch, shared by the deliveries and their audit entries
+        now = datetime.utcnow()
+        
+        # Cancel them all in one UPDATE
+        Delivery.query.filter(
+            Delivery.id.in_([d.id for d in active_deliveries])
+        ).update({
+            Delivery.status: 'canceled',
+            Delivery.canceled_at: now,
+            Delivery.canceled_by: 'system',
+            Delivery.cancellation_reason: 'Recipient account deleted',
+            Delivery.volunteer_id: None,
+            Delivery.claimed_at: None,
+            Delivery.picked_up_at: None
+        }, synchronize_session=False)
+        
+        # Audit log
+        AuditService.log_deliveries_canceled(
+            [(d.id, d.volunteer_id) for d in active_deliveries],
+            recipient_id=recipient.id,
+            canceled_by='system',
+            reason='Recipient account deleted',
+            timestamp=now
+        )
+        
+        db.session.commit()
+        
+        # Notify each affected volunteer once, listing all of their canceled deliveries (one batch send)
+        by_volunteer = defaultdict(list)
         for delivery in active_deliveries:
-            volunteer_id = delivery.volunteer_id
-            volunteer = delivery.volunteer  # Get volunteer before clearing
-            
-            delivery.status = 'canceled'
-            delivery.canceled_at = datetime.utcnow()
-            delivery.canceled_by = 'system'
-            delivery.cancellation_reason = 'Recipient account deleted'
-            delivery.volunteer_id = None
-            delivery.claimed_at = None
-            delivery.picked_up_at = None
-            
-            # Audit log
-            AuditService.log_delivery_canceled(
-                delivery.id,
-                volunteer_id=volunteer_id,
-                recipient_id=recipient.id,
-                canceled_by='system',
-                reason='Recipient account deleted'
+            if delivery.volunteer_id:
+                by_volunteer[delivery.volunteer_id].append(delivery.id)
+        
+        if by_volunteer:
+            enqueue(
+                NotificationService.send_volunteers_deliveries_canceled,
+                dict(by_volunteer),
+                reason='account_deleted'
             )
-            
-            # Notify volunteer if delivery was claimed
-            if volunteer:
-                try:
-                    from services.notification_service import NotificationService
-                    NotificationService.notify_volunteer_delivery_canceled(volunteer, delivery, reason='account_deleted')
-                except Exception as e:
-                    current_app.logger.error(f"Failed to send deletion notification: {e}")
         
-        db.session.commit()
         return len(active_deliveries)
@@ -1,61 +1,124 @@
+import base64
+import os
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from flask import current_app
 
 
 class EncryptionService:
-    """Service for encrypting/decrypting sensitive data like addresses and phone numbers."""
-    
-    _instance = None
-    
+    """Service for encrypting/decrypting sensitive data like addresses and phone numbers.
+
+    New values are encrypted with AES-256-GCM and tagged with GCM_PREFIX.
+    Untagged values are legacy Fernet tokens and are still decrypted with the
+    original key until they are re-encrypted (see `flask reencrypt-data`).
+    """
+
+    # One instance lives for the life of the app (see get_encryption_service)
+    __slots__ = ('cipher', 'aead', '_decrypt_token')
+
+    # Marks AES-GCM ciphertexts (':' never appears in a Fernet token)
+    GCM_PREFIX = 'g1:'
+    NONCE_SIZE = 12
+
+    # Shortest well-formed tokens: base64 of nonce + 16-byte tag, and an empty Fernet token
+    MIN_GCM_LENGTH = len(GCM_PREFIX) + 40
+    MIN_FERNET_LENGTH = 73
+    FERNET_PREFIX = 'gAAAAA'
+
+    # Number of decrypted values kept in memory for repeat views
+    DECRYPT_CACHE_SIZE = 1024
+
     def __init__(self, key=None):
         """Initialize with encryption key."""
         if key is None:
             key = current_app.config.get('ENCRYPTION_KEY')
-        
+
         if not key:
             raise ValueError("ENCRYPTION_KEY not configured")
-        
+
         # Handle both string and bytes
         if isinstance(key, str):
             key = key.encode()
-        
+
+        # Legacy cipher, kept for reading values written before AES-GCM
         self.cipher = Fernet(key)
-    
+
+        # Derive a separate 256-bit AES-GCM key from the configured key
+        aes_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'community-delivery field encryption'
+        ).derive(base64.urlsafe_b64decode(key))
+        self.aead = AESGCM(aes_key)
+
+        # Stored ciphertexts never change, so a decrypted value can be reused
+        self._decrypt_token = lru_cache(maxsize=self.DECRYPT_CACHE_SIZE)(self._decrypt_token_uncached)
+
     @classmethod
     def get_instance(cls):
-        """Get singleton instance for the current app context."""
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
-    
+        """Get the instance for the current app."""
+        return get_encryption_service()
+
     def encrypt(self, plaintext):
-        """Encrypt plaintext string, returns base64-encoded ciphertext."""
+        """Encrypt plaintext string, returns tagged base64-encoded ciphertext."""
         if not plaintext:
             return None
-        
+
         if isinstance(plaintext, str):
             plaintext = plaintext.encode('utf-8')
-        
-        return self.cipher.encrypt(plaintext).decode('utf-8')
-    
+
+        nonce = os.urandom(self.NONCE_SIZE)
+        token = base64.urlsafe_b64encode(nonce + self.aead.encrypt(nonce, plaintext, None))
+        return self.GCM_PREFIX + token.decode('ascii')
+
     def decrypt(self, ciphertext):
         """Decrypt ciphertext, returns plaintext string."""
         if not ciphertext:
             return None
-        
+
         if ciphertext == '[PURGED]':
             return None
-        
+
+        if isinstance(ciphertext, bytes):
+            ciphertext = ciphertext.decode('ascii', 'replace')
+
+        # Reject obviously malformed values before any key or MAC work
+        if not self._is_well_formed(ciphertext):
+            current_app.logger.error("Failed to decrypt data - malformed token")
+            return None
+
         try:
-            if isinstance(ciphertext, str):
-                ciphertext = ciphertext.encode('utf-8')
-            
-            return self.cipher.decrypt(ciphertext).decode('utf-8')
-        except InvalidToken:
+            return self._decrypt_token(ciphertext)
+        except (InvalidToken, InvalidTag, ValueError):
             # Log this - could indicate tampering or key rotation issue
             current_app.logger.error("Failed to decrypt data - invalid token")
             return None
-    
+
+    def is_legacy(self, ciphertext):
+        """Check if a stored value still uses the legacy Fernet format."""
+        if isinstance(ciphertext, bytes):
+            ciphertext = ciphertext.decode('ascii', 'replace')
+        return bool(ciphertext) and ciphertext != '[PURGED]' and not ciphertext.startswith(self.GCM_PREFIX)
+
+    def _is_well_formed(self, ciphertext):
+        if ciphertext.startswith(self.GCM_PREFIX):
+            return len(ciphertext) >= self.MIN_GCM_LENGTH
+        return len(ciphertext) >= self.MIN_FERNET_LENGTH and ciphertext.startswith(self.FERNET_PREFIX)
+
+    def _decrypt_token_uncached(self, ciphertext):
+        if ciphertext.startswith(self.GCM_PREFIX):
+            raw = base64.urlsafe_b64decode(ciphertext[len(self.GCM_PREFIX):])
+            nonce, sealed = raw[:self.NONCE_SIZE], raw[self.NONCE_SIZE:]
+            return self.aead.decrypt(nonce, sealed, None).decode('utf-8')
+
+        return self.cipher.decrypt(ciphertext.encode('utf-8')).decode('utf-8')
+
     @staticmethod
     def generate_key():
         """Generate a new Fernet key (for setup)."""
@@ -63,5 +126,9 @@ class EncryptionService:
 
 
 def get_encryption_service():
-    """Helper function to get encryption service instance."""
-    return EncryptionService.get_instance()
+    """Helper function to get the encryption service for the current app."""
+    service = current_app.extensions.get('encryption')
+    if service is None:
+        # Not created at startup (e.g. key configured afterwards); create it once now
+        service = current_app.extensions['encryption'] = EncryptionService()
+    return service
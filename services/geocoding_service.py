@@ -3,8 +3,19 @@ Geocoding service for address validation, autocomplete, and distance calculation
 Uses Google Places API.
 """
 import math
+import threading
+from functools import lru_cache
+
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.geo import fuzz_coordinates
+
+
+class _ApiStatusError(Exception):
+    """A Google API call returned a non-OK status."""
 
 
 class GeocodingService:
@@ -17,6 +28,50 @@ class GeocodingService:
     # Earth's radius in miles
     EARTH_RADIUS_MILES = 3959
     
+    # Used when ACCEPTED_STORE_TYPES isn't configured
+    DEFAULT_ACCEPTED_STORE_TYPES = frozenset({
+        'grocery_or_supermarket',
+        'supermarket',
+        'food',
+        'store',
+        'convenience_store',
+        'drugstore',
+        'department_store',
+        'shopping_mall',
+        'meal_delivery',
+        'meal_takeaway',
+    })
+    
+    # (connect, read) timeouts in seconds for Google API calls
+    REQUEST_TIMEOUT = (3.05, 10)
+    
+    # Successful lookups kept per process (place details and geocodes rarely change)
+    PLACE_CACHE_SIZE = 4096
+    GEOCODE_CACHE_SIZE = 1024
+    
+    # Shared HTTP session so calls reuse kept-alive TLS connections (created on first use)
+    _session = None
+    _session_lock = threading.Lock()
+    
+    @classmethod
+    def _get_session(cls):
+        """Get the process-wide requests session, creating it on first use."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    session.mount('https://', HTTPAdapter(
+                        pool_connections=4,
+                        pool_maxsize=32,
+                        max_retries=Retry(
+                            total=2,
+                            backoff_factor=0.2,
+                            status_forcelist=[429, 500, 502, 503, 504]
+                        )
+                    ))
+                    cls._session = session
+        return cls._session
+    
     @classmethod
     def get_api_key(cls):
         """Get the Google Places API key."""
@@ -38,33 +93,114 @@ class GeocodingService:
         """Get the configured service area radius in miles."""
         return current_app.config.get('SERVICE_AREA_RADIUS_MILES', 50)
     
+    @classmethod
+    def get_service_area(cls):
+        """Get (center_lat, center_lng, radius_miles) with a single config lookup."""
+        config = current_app.config
+        return (
+            config.get('SERVICE_AREA_CENTER_LAT', 38.5816),
+            config.get('SERVICE_AREA_CENTER_LNG', -121.4944),
+            config.get('SERVICE_AREA_RADIUS_MILES', 50)
+        )
+    
     @classmethod
     def calculate_distance(cls, lat1, lng1, lat2, lng2):
         """
         Calculate distance between two points using Haversine formula.
         Returns distance in miles.
         """
+        a = cls._haversine_term(lat1, lng1, lat2, lng2)
+        # Same as 2*atan2(sqrt(a), sqrt(1-a)) with one fewer sqrt; min() guards rounding past 1
+        c = 2 * math.asin(min(1.0, math.sqrt(a)))
+        
+        return cls.EARTH_RADIUS_MILES * c
+    
+    @staticmethod
+    def _haversine_term(lat1, lng1, lat2, lng2):
+        """Haversine 'a' (sin² of half the central angle) between two points."""
         # Convert to radians
         lat1_rad = math.radians(lat1)
         lat2_rad = math.radians(lat2)
         delta_lat = math.radians(lat2 - lat1)
         delta_lng = math.radians(lng2 - lng1)
         
-        # Haversine formula
-        a = math.sin(delta_lat / 2) ** 2 + \
+        return math.sin(delta_lat / 2) ** 2 + \
             math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    
+    @classmethod
+    def calculate_distances(cls, latitude, longitude, points):
+        """
+        Calculate distances in miles from one center to many (lat, lng) points.
+        Same formula as calculate_distance, with the center's trig done once.
+        A None point gives a None distance.
+        """
+        lat0_rad = math.radians(latitude)
+        lng0_rad = math.radians(longitude)
+        cos_lat0 = math.cos(lat0_rad)
+        diameter = 2 * cls.EARTH_RADIUS_MILES
         
-        return cls.EARTH_RADIUS_MILES * c
+        distances = []
+        for point in points:
+            if point is None:
+                distances.append(None)
+                continue
+            lat_rad = math.radians(point[0])
+            a = math.sin((lat_rad - lat0_rad) / 2) ** 2 + \
+                cos_lat0 * math.cos(lat_rad) * math.sin((math.radians(point[1]) - lng0_rad) / 2) ** 2
+            distances.append(diameter * math.asin(min(1.0, math.sqrt(a))))
+        return distances
+    
+    @classmethod
+    def bounding_box(cls, latitude, longitude, radius_miles):
+        """
+        Get the lat/lng box enclosing every point within radius_miles of a center.
+        Returns (min_lat, max_lat, min_lng, max_lng).
+        
+        Useful as a cheap (and index-friendly) prefilter before calculate_distance.
+        """
+        angular_radius = radius_miles / cls.EARTH_RADIUS_MILES
+        delta_lat = math.degrees(angular_radius)
+        
+        # Widest longitude extent of the circle; covers everything near the poles
+        cos_lat = math.cos(math.radians(latitude))
+        if cos_lat <= math.sin(angular_radius):
+            delta_lng = 180.0
+        else:
+            delta_lng = math.degrees(math.asin(math.sin(angular_radius) / cos_lat))
+        
+        return (
+            latitude - delta_lat,
+            latitude + delta_lat,
+            longitude - delta_lng,
+            longitude + delta_lng
+        )
     
     @classmethod
     def is_within_service_area(cls, latitude, longitude):
         """Check if a location is within the service area."""
-        center_lat, center_lng = cls.get_service_area_center()
-        radius = cls.get_service_area_radius()
+        center_lat, center_lng, radius = cls.get_service_area()
         
-        distance = cls.calculate_distance(center_lat, center_lng, latitude, longitude)
-        return distance <= radius
+        # Points outside the bounding box are out of range without any trig
+        min_lat, max_lat, min_lng, max_lng = cls._service_area_box(center_lat, center_lng, radius)
+        if not (min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng):
+            return False
+        
+        # distance <= radius  <=>  a <= sin²(radius / 2R), so skip the sqrt and asin
+        a = cls._haversine_term(center_lat, center_lng, latitude, longitude)
+        return a <= cls._service_area_threshold(radius)
+    
+    @classmethod
+    @lru_cache(maxsize=8)
+    def _service_area_box(cls, center_lat, center_lng, radius):
+        """Bounding box of the configured service area (fixed per config, so computed once)."""
+        return cls.bounding_box(center_lat, center_lng, radius)
+    
+    @classmethod
+    @lru_cache(maxsize=8)
+    def _service_area_threshold(cls, radius):
+        """Haversine 'a' at exactly radius miles (computed once per configured radius)."""
+        half_angle = min(radius / (2 * cls.EARTH_RADIUS_MILES), math.pi / 2)
+        return math.sin(half_angle) ** 2
     
     @classmethod
     def get_place_details(cls, place_id):
@@ -73,37 +209,48 @@ class GeocodingService:
         Returns dict with: name, address, latitude, longitude, types, place_id
         """
         try:
-            response = requests.get(
-                cls.GOOGLE_PLACE_DETAILS_URL,
-                params={
-                    'place_id': place_id,
-                    'fields': 'name,formatted_address,geometry,types,place_id',
-                    'key': cls.get_api_key()
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') != 'OK':
-                current_app.logger.error(f"Place details error: {data.get('status')}")
-                return None
-            
-            result = data.get('result', {})
-            geometry = result.get('geometry', {}).get('location', {})
-            
-            return {
-                'name': result.get('name', ''),
-                'address': result.get('formatted_address', ''),
-                'latitude': geometry.get('lat'),
-                'longitude': geometry.get('lng'),
-                'types': result.get('types', []),
-                'place_id': result.get('place_id')
-            }
-            
+            details = dict(cls._fetch_place_details(place_id, cls.get_api_key()))
+        except _ApiStatusError as e:
+            current_app.logger.error(f"Place details error: {e}")
+            return None
         except requests.RequestException as e:
             current_app.logger.error(f"Google Places API error: {e}")
             return None
+        
+        # Callers get their own list; the cached entry keeps an immutable tuple
+        details['types'] = list(details['types'])
+        return details
+    
+    @classmethod
+    @lru_cache(maxsize=PLACE_CACHE_SIZE)
+    def _fetch_place_details(cls, place_id, api_key):
+        """Fetch place details; raises on failure so only successful lookups are cached."""
+        response = cls._get_session().get(
+            cls.GOOGLE_PLACE_DETAILS_URL,
+            params={
+                'place_id': place_id,
+                'fields': 'name,formatted_address,geometry,types,place_id',
+                'key': api_key
+            },
+            timeout=cls.REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('status') != 'OK':
+            raise _ApiStatusError(data.get('status'))
+        
+        result = data.get('result', {})
+        geometry = result.get('geometry', {}).get('location', {})
+        
+        return {
+            'name': result.get('name', ''),
+            'address': result.get('formatted_address', ''),
+            'latitude': geometry.get('lat'),
+            'longitude': geometry.get('lng'),
+            'types': tuple(result.get('types', ())),
+            'place_id': result.get('place_id')
+        }
     
     @classmethod
     def geocode_address(cls, address):
@@ -111,37 +258,53 @@ class GeocodingService:
         Geocode an address string to coordinates.
         Returns dict with: address, latitude, longitude
         """
+        center_lat, center_lng = cls.get_service_area_center()
+        
+        # Case and spacing don't change the result, so they don't split the cache
+        normalized = ' '.join(address.split()).lower()
+        
         try:
-            center_lat, center_lng = cls.get_service_area_center()
-            
-            response = requests.get(
-                cls.GOOGLE_GEOCODE_URL,
-                params={
-                    'address': address,
-                    'key': cls.get_api_key(),
-                    # Bias results toward Sacramento
-                    'bounds': f"{center_lat - 1},{center_lng - 1}|{center_lat + 1},{center_lng + 1}"
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') != 'OK' or not data.get('results'):
-                return None
-            
-            result = data['results'][0]
-            location = result.get('geometry', {}).get('location', {})
-            
-            return {
-                'address': result.get('formatted_address', address),
-                'latitude': location.get('lat'),
-                'longitude': location.get('lng')
-            }
-            
+            location = cls._fetch_geocode(normalized, center_lat, center_lng, cls.get_api_key())
+        except _ApiStatusError:
+            return None
         except requests.RequestException as e:
             current_app.logger.error(f"Google Geocoding API error: {e}")
             return None
+        
+        return {
+            'address': location['address'] or address,
+            'latitude': location['latitude'],
+            'longitude': location['longitude']
+        }
+    
+    @classmethod
+    @lru_cache(maxsize=GEOCODE_CACHE_SIZE)
+    def _fetch_geocode(cls, address, center_lat, center_lng, api_key):
+        """Geocode an address; raises on failure so only successful lookups are cached."""
+        response = cls._get_session().get(
+            cls.GOOGLE_GEOCODE_URL,
+            params={
+                'address': address,
+                'key': api_key,
+                # Bias results toward Sacramento
+                'bounds': f"{center_lat - 1},{center_lng - 1}|{center_lat + 1},{center_lng + 1}"
+            },
+            timeout=cls.REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('status') != 'OK' or not data.get('results'):
+            raise _ApiStatusError(data.get('status'))
+        
+        result = data['results'][0]
+        location = result.get('geometry', {}).get('location', {})
+        
+        return {
+            'address': result.get('formatted_address'),
+            'latitude': location.get('lat'),
+            'longitude': location.get('lng')
+        }
     
     @classmethod
     def validate_address_in_service_area(cls, place_id=None, address=None):
@@ -204,20 +367,10 @@ class GeocodingService:
         Check if place types indicate a grocery/food store.
         Returns True if any accepted type is present.
         """
-        accepted_types = current_app.config.get('ACCEPTED_STORE_TYPES', {
-            'grocery_or_supermarket',
-            'supermarket', 
-            'food',
-            'store',
-            'convenience_store',
-            'drugstore',
-            'department_store',
-            'shopping_mall',
-            'meal_delivery',
-            'meal_takeaway',
-        })
+        accepted_types = current_app.config.get('ACCEPTED_STORE_TYPES', cls.DEFAULT_ACCEPTED_STORE_TYPES)
         
-        return bool(set(place_types) & accepted_types)
+        # Stops at the first accepted type instead of building an intersection
+        return any(place_type in accepted_types for place_type in place_types)
     
     @classmethod
     def validate_store_address(cls, place_id=None, address=None):
@@ -245,7 +398,4 @@ class GeocodingService:
         Round coordinates for privacy-preserving storage.
         2 decimal places ≈ 0.7 mile accuracy.
         """
-        if latitude is None or longitude is None:
-            return None, None
-        
-        return round(float(latitude), decimals), round(float(longitude), decimals)
+        return fuzz_coordinates(latitude, longitude, decimals)
@@ -4,13 +4,38 @@ Email notification service using Resend.
 This service is optional - if RESEND_API_KEY is not configured,
 notifications will be logged but not sent.
 """
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
 import resend
-from flask import current_app, render_template_string
+from flask import current_app
+from jinja2 import Environment
+from sqlalchemy.orm import joinedload
+
+from app import db
+from models.delivery import Delivery
+from models.recipient import Recipient
+from models.volunteer import Volunteer
+
+# Messages collected by NotificationService.batching() on this thread
+_batch_state = threading.local()
+
+PICKUP_TIME_FORMAT = '%B %d, %Y at %I:%M %p'
+
+
+@lru_cache(maxsize=1024)
+def format_pickup_time(pickup_time):
+    """Format a pickup time for emails (cached; pickup slots repeat across deliveries)."""
+    return pickup_time.strftime(PICKUP_TIME_FORMAT)
 
 
 class NotificationService:
     """Service for sending email notifications via Resend."""
     
+    # Resend accepts at most 100 emails per batch request
+    BATCH_SIZE = 100
+    
     # Email templates
     TEMPLATES = {
         'delivery_claimed': {
@@ -96,6 +121,27 @@ If you had already picked up the groceries, please contact an administrator imme
 
 Check the dashboard for other available deliveries: {{ app_url }}/volunteer/dashboard
 
+Thank you for your understanding.
+'''
+        },
+        'deliveries_canceled_account_deleted': {
+            'subject': 'Deliveries canceled - Recipient account closed',
+            'body': '''
+Hello {{ volunteer_name }},
+
+{{ deliveries|length }} deliveries you claimed have been automatically canceled because the recipient closed their account.
+
+Canceled Deliveries:
+{% for delivery in deliveries %}
+- Store: {{ delivery.store_name }}, was scheduled for: {{ delivery.pickup_time }}
+{% endfor %}
+
+We apologize for any inconvenience. These deliveries have been removed from your active deliveries.
+
+If you had already picked up the groceries, please contact an administrator immediately for assistance.
+
+Check the dashboard for other available deliveries: {{ app_url }}/volunteer/dashboard
+
 Thank you for your understanding.
 '''
         },
@@ -157,6 +203,14 @@ If you have questions about this suspension, please contact the organization adm
         """Check if Resend is configured."""
         return bool(current_app.config.get('RESEND_API_KEY'))
     
+    @classmethod
+    def skip_unconfigured(cls, description):
+        """Log and return True if Resend isn't configured, so callers can skip loading and rendering."""
+        if cls.is_configured():
+            return False
+        current_app.logger.info(f"[NOTIFICATION - NOT SENT - Resend not configured] {description}")
+        return True
+    
     @classmethod
     def get_app_url(cls):
         """Get the application URL for links in emails."""
@@ -170,28 +224,33 @@ If you have questions about this suspension, please contact the organization adm
     @classmethod
     def render_template(cls, template_name, **context):
         """Render an email template with context."""
-        template = cls.TEMPLATES.get(template_name)
-        if not template:
+        compiled = _COMPILED_TEMPLATES.get(template_name)
+        if not compiled:
             raise ValueError(f"Unknown template: {template_name}")
         
         # Add app_url to context
         context['app_url'] = cls.get_app_url()
         
-        subject = render_template_string(template['subject'], **context)
-        body = render_template_string(template['body'], **context)
-        
-        return subject, body
+        subject_template, body_template = compiled
+        return subject_template.render(**context), body_template.render(**context)
     
     @classmethod
     def send_email(cls, to_email, subject, body):
         """Send an email via Resend."""
-        if not cls.is_configured():
+        api_key = current_app.config.get('RESEND_API_KEY')
+        if not api_key:
             current_app.logger.info(f"[NOTIFICATION - NOT SENT - Resend not configured] To: {to_email}, Subject: {subject}")
             return False
         
+        # Inside batching(): queue it, the block sends everything on exit
+        pending = getattr(_batch_state, 'messages', None)
+        if pending is not None:
+            pending.append((to_email, subject, body))
+            return True
+        
         try:
             # Set API key
-            resend.api_key = current_app.config['RESEND_API_KEY']
+            resend.api_key = api_key
             
             # Send email
             result = resend.Emails.send({
@@ -212,6 +271,58 @@ If you have questions about this suspension, please contact the organization adm
             current_app.logger.error(f"[NOTIFICATION ERROR] {str(e)}, To: {to_email}")
             return False
     
+    @classmethod
+    def send_emails_batch(cls, messages):
+        """Send (to_email, subject, body) messages via Resend's batch endpoint. Returns count sent."""
+        if len(messages) == 1:
+            return int(cls.send_email(*messages[0]))
+        
+        api_key = current_app.config.get('RESEND_API_KEY')
+        if not api_key:
+            current_app.logger.info(f"[NOTIFICATION - NOT SENT - Resend not configured] {len(messages)} emails")
+            return 0
+        
+        resend.api_key = api_key
+        from_email = cls.get_from_email()
+        
+        sent = 0
+        for start in range(0, len(messages), cls.BATCH_SIZE):
+            chunk = messages[start:start + cls.BATCH_SIZE]
+            try:
+                result = resend.Batch.send([
+                    {
+                        "from": from_email,
+                        "to": [to_email],
+                        "subject": subject,
+                        "text": body
+                    }
+                    for to_email, subject, body in chunk
+                ])
+                ids = [item.get('id') for item in (result or {}).get('data', []) if item.get('id')]
+                current_app.logger.info(f"[NOTIFICATION BATCH SENT] {len(ids)} of {len(chunk)} emails")
+                sent += len(ids)
+            except Exception as e:
+                current_app.logger.error(f"[NOTIFICATION BATCH ERROR] {str(e)}, {len(chunk)} emails")
+        
+        return sent
+    
+    @classmethod
+    @contextmanager
+    def batching(cls):
+        """Collect send_email calls made in the block and send them in batch requests on exit."""
+        if getattr(_batch_state, 'messages', None) is not None:
+            # Nested; the outermost block sends
+            yield
+            return
+        
+        _batch_state.messages = []
+        try:
+            yield
+        finally:
+            messages, _batch_state.messages = _batch_state.messages, None
+            if messages:
+                cls.send_emails_batch(messages)
+    
     # Convenience methods for specific notifications
     
     @classmethod
@@ -225,7 +336,7 @@ If you have questions about this suspension, please contact the organization adm
             recipient_name=recipient.display_name,
             volunteer_name=volunteer.full_name,
             store_name=delivery.store_name,
-            pickup_time=delivery.pickup_time.strftime('%B %d, %Y at %I:%M %p'),
+            pickup_time=format_pickup_time(delivery.pickup_time),
             delivery_id=delivery.id
         )
         
@@ -275,11 +386,105 @@ If you have questions about this suspension, please contact the organization adm
             template,
             volunteer_name=volunteer.full_name,
             store_name=delivery.store_name,
-            pickup_time=delivery.pickup_time.strftime('%B %d, %Y at %I:%M %p')
+            pickup_time=format_pickup_time(delivery.pickup_time)
+        )
+        
+        return cls.send_email(volunteer.user.email, subject, body)
+    
+    # Entry points for background jobs (take IDs, load in the job's own session)
+    
+    @classmethod
+    def send_delivery_update(cls, delivery_id, event):
+        """Notify the recipient of a delivery event ('claimed', 'picked_up' or 'completed')."""
+        if cls.skip_unconfigured(f"Delivery {delivery_id} {event}"):
+            return False
+        
+        # Everything the templates use, in one SELECT
+        delivery = db.session.get(Delivery, delivery_id, options=[
+            joinedload(Delivery.recipient).joinedload(Recipient.user),
+            joinedload(Delivery.volunteer)
+        ])
+        if delivery is None:
+            return False
+        
+        if event == 'claimed':
+            return cls.notify_delivery_claimed(delivery)
+        if event == 'picked_up':
+            return cls.notify_delivery_picked_up(delivery)
+        return cls.notify_delivery_completed(delivery)
+    
+    @classmethod
+    def send_volunteer_delivery_canceled(cls, volunteer_id, delivery_id, reason='recipient'):
+        """Notify a volunteer that a delivery they had claimed was canceled."""
+        if cls.skip_unconfigured(f"Delivery {delivery_id} canceled, volunteer {volunteer_id}"):
+            return False
+        
+        volunteer = db.session.get(Volunteer, volunteer_id, options=[joinedload(Volunteer.user)])
+        delivery = db.session.get(Delivery, delivery_id)
+        if volunteer is None or delivery is None:
+            return False
+        
+        return cls.notify_volunteer_delivery_canceled(volunteer, delivery, reason=reason)
+    
+    @classmethod
+    def send_volunteers_deliveries_canceled(cls, delivery_ids_by_volunteer, reason='account_deleted'):
+        """Notify several volunteers of their canceled deliveries, sent as one batch."""
+        if cls.skip_unconfigured(f"Deliveries canceled for volunteers {list(delivery_ids_by_volunteer)}"):
+            return
+        
+        with cls.batching():
+            for volunteer_id, delivery_ids in delivery_ids_by_volunteer.items():
+                cls.send_volunteer_deliveries_canceled(volunteer_id, delivery_ids, reason=reason)
+    
+    @classmethod
+    def send_volunteer_deliveries_canceled(cls, volunteer_id, delivery_ids, reason='account_deleted'):
+        """Notify a volunteer once about several canceled deliveries."""
+        if cls.skip_unconfigured(f"Deliveries {list(delivery_ids)} canceled, volunteer {volunteer_id}"):
+            return False
+        
+        volunteer = db.session.get(Volunteer, volunteer_id, options=[joinedload(Volunteer.user)])
+        if volunteer is None:
+            return False
+        
+        deliveries = Delivery.query.filter(Delivery.id.in_(delivery_ids)).order_by(Delivery.pickup_time).all()
+        if len(deliveries) == 1:
+            return cls.notify_volunteer_delivery_canceled(volunteer, deliveries[0], reason=reason)
+        
+        return cls.notify_volunteer_deliveries_canceled(volunteer, deliveries)
+    
+    @classmethod
+    def notify_volunteer_deliveries_canceled(cls, volunteer, deliveries):
+        """Notify volunteer that several claimed deliveries were canceled (account deleted)."""
+        subject, body = cls.render_template(
+            'deliveries_canceled_account_deleted',
+            volunteer_name=volunteer.full_name,
+            deliveries=[
+                {
+                    'store_name': delivery.store_name,
+                    'pickup_time': format_pickup_time(delivery.pickup_time)
+                }
+                for delivery in deliveries
+            ]
         )
         
         return cls.send_email(volunteer.user.email, subject, body)
     
+    @classmethod
+    def send_volunteer_review(cls, volunteer_id, decision, reason=None):
+        """Notify a volunteer of an admin decision ('approved', 'rejected' or 'suspended')."""
+        if cls.skip_unconfigured(f"Volunteer {volunteer_id} {decision}"):
+            return False
+        
+        volunteer = db.session.get(Volunteer, volunteer_id, options=[joinedload(Volunteer.user)])
+        if volunteer is None:
+            return False
+        
+        if decision == 'approved':
+            return cls.notify_volunteer_approved(volunteer)
+        if decision == 'rejected':
+            return cls.notify_volunteer_rejected(volunteer, reason)
+        return cls.notify_volunteer_suspended(volunteer, reason)
+    
     @classmethod
     def notify_volunteer_approved(cls, volunteer):
         """Notify volunteer that their application was approved."""
@@ -310,4 +515,12 @@ If you have questions about this suspension, please contact the organization adm
             reason=reason
         )
         
-        return cls.send_email(volunteer.user.email, subject, body)
\ No newline at end of file
+        return cls.send_email(volunteer.user.email, subject, body)
+
+
+# Compile each template once at import. Emails are plain text, so no HTML autoescaping.
+_JINJA_ENV = Environment(autoescape=False)
+_COMPILED_TEMPLATES = {
+    name: (_JINJA_ENV.from_string(template['subject']), _JINJA_ENV.from_string(template['body']))
+    for name, template in NotificationService.TEMPLATES.items()
+}
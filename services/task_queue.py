@@ -0,0 +1,73 @@
+"""
+Background task runner.
+
+When TASK_QUEUE_ENABLED is set, jobs such as notification emails are run by a
+daemon thread after the request returns, so slow external APIs stay off the
+request path. Otherwise jobs run inline. Jobs should take IDs rather than ORM
+objects, since they run in their own app context and session.
+"""
+import atexit
+import queue
+import threading
+
+from flask import current_app
+
+# Sentinel telling the worker to finish queued jobs and exit
+_STOP = object()
+
+
+class TaskQueue:
+    """In-process queue of jobs, run one at a time by a worker thread."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register with the app and start the worker thread."""
+        self.app = app
+        app.extensions['task_queue'] = self
+
+        self._thread = threading.Thread(target=self._run, name='task-queue', daemon=True)
+        self._thread.start()
+
+        # Run pending jobs on interpreter shutdown (incl. SIGTERM from gunicorn)
+        atexit.register(self.stop)
+
+    def put(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) to run in the background."""
+        self._queue.put((func, args, kwargs))
+
+    def stop(self, timeout=30):
+        """Run queued jobs and stop the worker."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            func, args, kwargs = job
+            with self.app.app_context():
+                _run_job(self.app, func, args, kwargs)
+
+
+def _run_job(app, func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        app.logger.error(f"Background task {func.__qualname__} failed: {e}")
+
+
+def enqueue(func, *args, **kwargs):
+    """Run func(*args, **kwargs) in the background if enabled, otherwise now."""
+    task_queue = current_app.extensions.get('task_queue')
+    if task_queue is not None:
+        task_queue.put(func, *args, **kwargs)
+    else:
+        _run_job(current_app, func, args, kwargs)
@@ -1,24 +1,120 @@
+import math
+from datetime import datetime
+
 import pytest
+from flask import g
+from sqlalchemy import event, insert
+from sqlalchemy.orm import scoped_session, sessionmaker
 from app import create_app, db
 from models.user import User
 from models.recipient import Recipient
 from models.volunteer import Volunteer
+from models.delivery import Delivery
+from services.geocoding_service import GeocodingService
 from werkzeug.security import generate_password_hash
 
+# Real hashes are deliberately slow; tests only need a valid one, so use few rounds and reuse it
+_password_hashes = {}
 
-@pytest.fixture
+
+def hash_password(password):
+    """Return a cheap, cached password hash for test users."""
+    if password not in _password_hashes:
+        _password_hashes[password] = generate_password_hash(password, method='pbkdf2:sha256:1000')
+    return _password_hashes[password]
+
+
+def add_user(email, password, role='recipient'):
+    """Add a user to the session (caller commits)."""
+    user = User(
+        email=email,
+        password_hash=hash_password(password),
+        role=role
+    )
+    db.session.add(user)
+    return user
+
+
+def add_recipient(email, password, display_name='Test User', **fields):
+    """Add a recipient and their user to the session (caller commits)."""
+    recipient = Recipient(
+        user=add_user(email, password, 'recipient'),
+        display_name=display_name,
+        address_encrypted='encrypted_test_address',
+        **fields
+    )
+    db.session.add(recipient)
+    return recipient
+
+
+def add_volunteer(email, password, full_name='Test Volunteer', status='approved', **fields):
+    """Add a volunteer and their user to the session (caller commits)."""
+    volunteer = Volunteer(
+        user=add_user(email, password, 'volunteer'),
+        full_name=full_name,
+        status=status,
+        attestation_completed=True,
+        **fields
+    )
+    db.session.add(volunteer)
+    return volunteer
+
+
+@pytest.fixture(scope='session')
 def app():
-    """Create application for testing."""
+    """Create application and schema once for the test session.
+    
+    Each pytest-xdist worker is its own process, so each gets its own
+    in-memory database and session fixtures; nothing is shared between them.
+    """
     app = create_app('testing')
     
     with app.app_context():
+        # Let SQLAlchemy control transactions so savepoints roll back properly
+        @event.listens_for(db.engine, 'connect')
+        def disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+        
+        @event.listens_for(db.engine, 'begin')
+        def emit_begin(connection):
+            connection.exec_driver_sql('BEGIN')
+        
         db.create_all()
         yield app
         db.drop_all()
 
 
+@pytest.fixture(autouse=True)
+def db_session(app):
+    """Run each test in a transaction that is rolled back afterwards.
+    
+    The in-memory database uses a single shared connection (StaticPool, see
+    TestingConfig), so sessions bound to it see the test's data; commits only
+    release savepoints.
+    """
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    
+    original_session = db.session
+    # Flask-SQLAlchemy's Session always picks the engine, so use a plain Session bound to the connection
+    db.session = scoped_session(
+        sessionmaker(bind=connection, join_transaction_mode='create_savepoint', query_cls=db.Query),
+        # One session per app context, like Flask-SQLAlchemy's own scoping
+        scopefunc=lambda: id(g._get_current_object())
+    )
+    
+    # Fresh app context per test so g (e.g. the logged-in user) doesn't leak between tests
+    with app.app_context():
+        yield db.session
+    
+    db.session.remove()
+    db.session = original_session
+    transaction.rollback()
+    connection.close()
+
+
 @pytest.fixture
-def client(app):
+def client(app, db_session):
     """Create test client."""
     return app.test_client()
 
@@ -30,7 +126,7 @@ def runner(app):
 
 
 @pytest.fixture
-def auth_client(client, app):
+def auth_client(client, app, db_session):
     """Create authenticated test client helper."""
     class AuthClient:
         def __init__(self, client, app):
@@ -47,56 +143,19 @@ def auth_client(client, app):
             return self.client.get('/logout', follow_redirects=True)
         
         def create_user(self, email, password, role='recipient'):
-            with self.app.app_context():
-                user = User(
-                    email=email,
-                    password_hash=generate_password_hash(password),
-                    role=role
-                )
-                db.session.add(user)
-                db.session.commit()
-                return user.id
+            user = add_user(email, password, role)
+            db.session.commit()
+            return user.id
         
         def create_recipient(self, email, password, display_name='Test User'):
-            with self.app.app_context():
-                user = User(
-                    email=email,
-                    password_hash=generate_password_hash(password),
-                    role='recipient'
-                )
-                db.session.add(user)
-                db.session.flush()
-                
-                recipient = Recipient(
-                    user_id=user.id,
-                    display_name=display_name,
-                    address_encrypted='encrypted_test_address',
-                    general_area='Test Area'
-                )
-                db.session.add(recipient)
-                db.session.commit()
-                return user.id, recipient.id
+            recipient = add_recipient(email, password, display_name)
+            db.session.commit()
+            return recipient.user_id, recipient.id
         
         def create_volunteer(self, email, password, full_name='Test Volunteer', status='approved'):
-            with self.app.app_context():
-                user = User(
-                    email=email,
-                    password_hash=generate_password_hash(password),
-                    role='volunteer'
-                )
-                db.session.add(user)
-                db.session.flush()
-                
-                volunteer = Volunteer(
-                    user_id=user.id,
-                    full_name=full_name,
-                    service_area='Test Area',
-                    status=status,
-                    attestation_completed=True
-                )
-                db.session.add(volunteer)
-                db.session.commit()
-                return user.id, volunteer.id
+            volunteer = add_volunteer(email, password, full_name, status)
+            db.session.commit()
+            return volunteer.user_id, volunteer.id
         
         def create_admin(self, email, password):
             return self.create_user(email, password, role='admin')
@@ -104,26 +163,93 @@ def auth_client(client, app):
     return AuthClient(client, app)
 
 
-@pytest.fixture
-def sample_recipient(auth_client):
-    """Create a sample recipient for testing."""
-    user_id, recipient_id = auth_client.create_recipient(
-        'recipient@test.com', 'password123', 'Test Recipient'
-    )
-    return {'user_id': user_id, 'recipient_id': recipient_id, 'email': 'recipient@test.com', 'password': 'password123'}
+SAMPLE_PASSWORD = 'password123'
 
+# Sample volunteer's service area (downtown Sacramento); the sample recipient lives at its center
+SAMPLE_CENTER = (38.5816, -121.4944)
+SAMPLE_RADIUS_MILES = 10
 
-@pytest.fixture
-def sample_volunteer(auth_client):
-    """Create a sample approved volunteer for testing."""
-    user_id, volunteer_id = auth_client.create_volunteer(
-        'volunteer@test.com', 'password123', 'Test Volunteer'
+# Fixed pickup time, safely in the future, so test data doesn't depend on the clock
+FUTURE_PICKUP = datetime(2099, 1, 1, 12, 0)
+
+
+def point_at(distance_miles, bearing_degrees, origin=SAMPLE_CENTER):
+    """(lat, lng) reached by travelling distance_miles from origin on the given bearing."""
+    lat1, lng1 = math.radians(origin[0]), math.radians(origin[1])
+    angle = distance_miles / GeocodingService.EARTH_RADIUS_MILES
+    bearing = math.radians(bearing_degrees)
+    lat2 = math.asin(math.sin(lat1) * math.cos(angle) + math.cos(lat1) * math.sin(angle) * math.cos(bearing))
+    lng2 = lng1 + math.atan2(
+        math.sin(bearing) * math.sin(angle) * math.cos(lat1),
+        math.cos(angle) - math.sin(lat1) * math.sin(lat2)
     )
-    return {'user_id': user_id, 'volunteer_id': volunteer_id, 'email': 'volunteer@test.com', 'password': 'password123'}
+    return round(math.degrees(lat2), 5), round(math.degrees(lng2), 5)
+
+
+@pytest.fixture(scope='session')
+def sample_all(app):
+    """Create a sample recipient, approved volunteer and admin once for the test session.
+    
+    They are committed before any test's rolled-back transaction begins, so every
+    test sees them and changes a test makes to them are undone afterwards.
+    """
+    with app.app_context():
+        recipient = add_recipient(
+            'recipient@test.com', SAMPLE_PASSWORD, 'Test Recipient',
+            latitude=round(SAMPLE_CENTER[0], 2), longitude=round(SAMPLE_CENTER[1], 2)
+        )
+        volunteer = add_volunteer(
+            'volunteer@test.com', SAMPLE_PASSWORD, 'Test Volunteer',
+            service_center_lat=SAMPLE_CENTER[0], service_center_lng=SAMPLE_CENTER[1],
+            service_radius_miles=SAMPLE_RADIUS_MILES
+        )
+        admin = add_user('admin@test.com', SAMPLE_PASSWORD, 'admin')
+        db.session.commit()
+        
+        return {
+            'recipient': {'user_id': recipient.user_id, 'recipient_id': recipient.id, 'email': 'recipient@test.com', 'password': SAMPLE_PASSWORD},
+            'volunteer': {'user_id': volunteer.user_id, 'volunteer_id': volunteer.id, 'email': 'volunteer@test.com', 'password': SAMPLE_PASSWORD},
+            'admin': {'user_id': admin.id, 'email': 'admin@test.com', 'password': SAMPLE_PASSWORD}
+        }
+
+
+@pytest.fixture(scope='session')
+def sample_recipient(sample_all):
+    """Sample recipient for testing."""
+    return sample_all['recipient']
+
+
+@pytest.fixture(scope='session')
+def sample_volunteer(sample_all):
+    """Sample approved volunteer for testing."""
+    return sample_all['volunteer']
+
+
+@pytest.fixture(scope='session')
+def sample_admin(sample_all):
+    """Sample admin for testing."""
+    return sample_all['admin']
 
 
 @pytest.fixture
-def sample_admin(auth_client):
-    """Create a sample admin for testing."""
-    user_id = auth_client.create_admin('admin@test.com', 'password123')
-    return {'user_id': user_id, 'email': 'admin@test.com', 'password': 'password123'}
+def make_delivery(sample_recipient, db_session):
+    """Factory for deliveries requested by the sample recipient.
+    
+    Call with field overrides; returns the new id, or a list of ids when
+    count > 1 (all rows go in one executemany INSERT).
+    """
+    def make(count=1, **fields):
+        row = {
+            'recipient_id': sample_recipient['recipient_id'],
+            'store_name': 'Test Store',
+            'pickup_address': '123 Store St',
+            'order_name': 'Test Order',
+            'pickup_time': FUTURE_PICKUP,
+            'status': 'open',
+            **fields
+        }
+        delivery_ids = db.session.scalars(insert(Delivery).returning(Delivery.id), [row] * count).all()
+        db.session.commit()
+        return delivery_ids[0] if count == 1 else delivery_ids
+    
+    return make
@@ -0,0 +1,78 @@
+"""Tests for audit logging."""
+import time
+from datetime import datetime
+
+import pytest
+
+from models.audit import AuditLog
+from services.audit_queue import AuditQueue
+from services.audit_service import AuditService
+
+
+@pytest.fixture
+def audit_queue(app):
+    """Background audit writer registered on the app for one test."""
+    audit_queue = AuditQueue(app)
+    yield audit_queue
+    audit_queue.stop()
+    app.extensions.pop('audit_queue', None)
+
+
+def test_audit_queue_writes_on_stop(audit_queue):
+    """Test queued entries are written in one batch on stop, keeping their timestamps."""
+    timestamps = [datetime(2024, 5, 1, 9, 30, second) for second in range(3)]
+    for delivery_id, timestamp in enumerate(timestamps, start=1):
+        audit_queue.put(action=AuditLog.DELIVERY_CREATED, delivery_id=delivery_id, timestamp=timestamp)
+    audit_queue.put(action=AuditLog.MESSAGE_SENT, delivery_id=4)
+    
+    # Nothing is written until the flush interval ends or the queue stops
+    assert AuditLog.query.count() == 0
+    
+    audit_queue.stop()
+    
+    entries = AuditLog.query.order_by(AuditLog.delivery_id).all()
+    assert [entry.delivery_id for entry in entries] == [1, 2, 3, 4]
+    assert [entry.timestamp for entry in entries[:3]] == timestamps
+    assert entries[3].action == AuditLog.MESSAGE_SENT
+    assert entries[3].timestamp is not None
+
+
+def test_audit_queue_writes_after_interval(app, monkeypatch):
+    """Test queued entries are written once the flush interval ends."""
+    monkeypatch.setattr(AuditQueue, 'FLUSH_INTERVAL_SECONDS', 0.05)
+    audit_queue = AuditQueue(app)
+    try:
+        audit_queue.put(action=AuditLog.DELIVERY_CREATED, delivery_id=1)
+        
+        deadline = time.monotonic() + 5
+        while AuditLog.query.count() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        assert AuditLog.query.count() == 1
+        assert audit_queue._thread.is_alive()
+    finally:
+        audit_queue.stop()
+        app.extensions.pop('audit_queue', None)
+
+
+def test_audit_queue_failed_flush(app, audit_queue, monkeypatch):
+    """Test a batch that fails to insert is rolled back and logged."""
+    errors = []
+    monkeypatch.setattr(app.logger, 'error', errors.append)
+    
+    audit_queue.put(action=AuditLog.DELIVERY_CREATED, delivery_id=1)
+    audit_queue.put(action=None, delivery_id=2)  # action is NOT NULL
+    audit_queue.stop()
+    
+    assert AuditLog.query.count() == 0
+    assert len(errors) == 1
+    assert errors[0].startswith('Failed to write 2 audit entries')
+
+
+def test_audit_service_uses_queue(app, audit_queue):
+    """Test non-critical entries go through the queue when it is enabled."""
+    AuditService.log_delivery_created(1, 1)
+    assert AuditLog.query.count() == 0
+    
+    audit_queue.stop()
+    assert AuditLog.query.filter_by(action=AuditLog.DELIVERY_CREATED, delivery_id=1).count() == 1
@@ -0,0 +1,94 @@
+"""Tests for data retention cleanup."""
+from datetime import date, datetime, timedelta
+
+from app import db
+from models.audit import AuditLog
+from models.recipient import Recipient, RecipientTombstone
+from services.cleanup_service import _inactivity_cutoff, purge_inactive_accounts
+from tests.conftest import add_recipient
+
+
+def add_inactive_recipients(prefix, count, last_active):
+    """Add recipients whose users were last active at last_active; returns their ids."""
+    recipients = []
+    for i in range(count):
+        recipient = add_recipient(f'{prefix}{i}@test.com', 'password123')
+        recipient.user.last_active = last_active
+        recipients.append(recipient)
+    db.session.commit()
+    return [recipient.id for recipient in recipients]
+
+
+def test_inactivity_cutoff_calendar_months():
+    """Test the cutoff is whole calendar months back, clamped to the month's length."""
+    assert _inactivity_cutoff(1, date(2024, 3, 31)) == datetime(2024, 2, 29)
+    assert _inactivity_cutoff(1, date(2023, 3, 31)) == datetime(2023, 2, 28)
+    assert _inactivity_cutoff(12, date(2024, 2, 29)) == datetime(2023, 2, 28)
+    assert _inactivity_cutoff(18, date(2025, 7, 15)) == datetime(2024, 1, 15)
+    assert _inactivity_cutoff(3, date(2025, 1, 10)) == datetime(2024, 10, 10)
+
+
+def test_inactivity_cutoff_is_memoized():
+    """Test repeat sweeps on the same day reuse the computed cutoff."""
+    first = _inactivity_cutoff(18, date(2030, 5, 31))
+    hits = _inactivity_cutoff.cache_info().hits
+    
+    assert _inactivity_cutoff(18, date(2030, 5, 31)) is first
+    assert _inactivity_cutoff.cache_info().hits == hits + 1
+
+
+def test_purge_cutoff_boundary():
+    """Test users active exactly at the cutoff are kept and those just before are purged."""
+    cutoff = _inactivity_cutoff(18, datetime.utcnow().date())
+    kept_ids = add_inactive_recipients('kept', 1, cutoff)
+    purged_ids = add_inactive_recipients('purged', 1, cutoff - timedelta(seconds=1))
+    
+    assert purge_inactive_accounts(months=18) == 1
+    assert db.session.get(Recipient, kept_ids[0]).deleted_at is None
+    assert db.session.get(Recipient, purged_ids[0]).deleted_at is not None
+
+
+def test_purge_in_batches(monkeypatch):
+    """Test eligible recipients are purged over several batches, each getting tombstones."""
+    recipient_ids = add_inactive_recipients('inactive', 5, datetime(2000, 1, 1))
+    
+    batches = []
+    bulk_create = RecipientTombstone.bulk_create_from_ids
+    
+    def record_batch(ids, deleted_at=None):
+        batches.append(list(ids))
+        return bulk_create(ids, deleted_at=deleted_at)
+    
+    monkeypatch.setattr(RecipientTombstone, 'bulk_create_from_ids', record_batch)
+    
+    assert purge_inactive_accounts(months=18, batch_size=2) == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(sum(batches, [])) == sorted(recipient_ids)
+    
+    for recipient_id in recipient_ids:
+        recipient = db.session.get(Recipient, recipient_id)
+        tombstone = db.session.get(RecipientTombstone, recipient_id)
+        assert recipient.address_encrypted == '[PURGED]'
+        assert recipient.contact_encrypted is None
+        assert tombstone.deleted_at == recipient.deleted_at
+    
+    purged_logs = AuditLog.query.filter_by(action=AuditLog.RECIPIENT_DATA_PURGED).count()
+    assert purged_logs == 5
+
+
+def test_purge_tombstone_volunteers(sample_volunteer, make_delivery, auth_client):
+    """Test tombstones list each volunteer who handled the recipient once."""
+    recipient_id, = add_inactive_recipients('inactive', 1, datetime(2000, 1, 1))
+    _, other_volunteer_id = auth_client.create_volunteer('other@test.com', 'password123')
+    
+    volunteer_id = sample_volunteer['volunteer_id']
+    make_delivery(recipient_id=recipient_id, volunteer_id=volunteer_id, status='completed')
+    make_delivery(recipient_id=recipient_id, volunteer_id=volunteer_id, status='completed')
+    make_delivery(recipient_id=recipient_id, volunteer_id=other_volunteer_id, status='completed')
+    make_delivery(recipient_id=recipient_id, status='canceled')
+    
+    assert purge_inactive_accounts(months=18) == 1
+    
+    tombstone = db.session.get(RecipientTombstone, recipient_id)
+    assert sorted(tombstone.volunteer_ids) == sorted([volunteer_id, other_volunteer_id])
+    assert tombstone.last_active_date == date(2000, 1, 1)
@@ -1,16 +1,34 @@
 """Tests for delivery workflow."""
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import inspect
 
 from app import db
+from models.audit import AuditLog
 from models.delivery import Delivery
+from models.recipient import Recipient
+from models.volunteer import Volunteer
+from services.cleanup_service import delete_recipient_account
+from services.delivery_service import DeliveryService
+from services.geocoding_service import GeocodingService
+from tests.conftest import FUTURE_PICKUP, SAMPLE_CENTER, SAMPLE_RADIUS_MILES, point_at
 
 
-def test_create_delivery_request(auth_client, sample_recipient, app):
+def test_create_delivery_request(auth_client, sample_recipient, monkeypatch):
     """Test recipient can create a delivery request."""
+    # Skip the Google Places lookup; the store is inside the service area
+    monkeypatch.setattr(GeocodingService, 'validate_store_address', lambda place_id=None, address=None: {
+        'valid': True,
+        'needs_confirmation': False,
+        'name': 'Test Store',
+        'address': address,
+        'latitude': SAMPLE_CENTER[0],
+        'longitude': SAMPLE_CENTER[1]
+    })
+    
     auth_client.login(sample_recipient['email'], sample_recipient['password'])
     
-    pickup_time = (datetime.now() + timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M')
+    pickup_time = FUTURE_PICKUP.strftime('%Y-%m-%dT%H:%M')
     
     response = auth_client.client.post('/recipient/request/new', data={
         'store_name': 'Test Store',
@@ -23,27 +41,18 @@ def test_create_delivery_request(auth_client, sample_recipient, app):
     assert response.status_code == 200
     assert b'Delivery request created' in response.data or b'Test Store' in response.data
     
-    # Verify delivery was created
-    with app.app_context():
-        delivery = Delivery.query.filter_by(store_name='Test Store').first()
-        assert delivery is not None
-        assert delivery.status == 'open'
+    # Verify delivery was created (the view redirects to its detail page)
+    delivery_id = int(response.request.path.rsplit('/', 1)[-1])
+    delivery = db.session.get(Delivery, delivery_id)
+    assert delivery is not None
+    assert delivery.store_name == 'Test Store'
+    assert delivery.status == 'open'
 
 
-def test_volunteer_can_view_available_deliveries(auth_client, sample_volunteer, sample_recipient, app):
+def test_volunteer_can_view_available_deliveries(auth_client, sample_volunteer, make_delivery):
     """Test volunteer can see available deliveries."""
     # Create a delivery first
-    with app.app_context():
-        delivery = Delivery(
-            recipient_id=sample_recipient['recipient_id'],
-            store_name='Available Store',
-            pickup_address='456 Store Ave',
-            order_name='Pickup Order',
-            pickup_time=datetime.now() + timedelta(hours=1),
-            status='open'
-        )
-        db.session.add(delivery)
-        db.session.commit()
+    make_delivery(store_name='Available Store', store_latitude=SAMPLE_CENTER[0], store_longitude=SAMPLE_CENTER[1])
     
     auth_client.login(sample_volunteer['email'], sample_volunteer['password'])
     response = auth_client.client.get('/volunteer/dashboard')
@@ -52,59 +61,34 @@ def test_volunteer_can_view_available_deliveries(auth_client, sample_volunteer,
     assert b'Available Store' in response.data
 
 
-def test_volunteer_can_claim_delivery(auth_client, sample_volunteer, sample_recipient, app):
+def test_volunteer_can_claim_delivery(auth_client, sample_volunteer, make_delivery):
     """Test volunteer can claim an open delivery."""
     # Create a delivery
-    with app.app_context():
-        delivery = Delivery(
-            recipient_id=sample_recipient['recipient_id'],
-            store_name='Claimable Store',
-            pickup_address='789 Store Blvd',
-            order_name='Claim Order',
-            pickup_time=datetime.now() + timedelta(hours=1),
-            status='open'
-        )
-        db.session.add(delivery)
-        db.session.commit()
-        delivery_id = delivery.id
+    delivery_id = make_delivery(store_name='Claimable Store')
     
     auth_client.login(sample_volunteer['email'], sample_volunteer['password'])
-    response = auth_client.client.post(f'/volunteer/request/{delivery_id}/claim', follow_redirects=True)
+    response = auth_client.client.post(f'/volunteer/request/{delivery_id}/claim')
     
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.location == f'/volunteer/request/{delivery_id}'
     
     # Verify delivery was claimed
-    with app.app_context():
-        delivery = Delivery.query.get(delivery_id)
-        assert delivery.status == 'claimed'
-        assert delivery.volunteer_id == sample_volunteer['volunteer_id']
+    delivery = db.session.get(Delivery, delivery_id)
+    assert delivery.status == 'claimed'
+    assert delivery.volunteer_id == sample_volunteer['volunteer_id']
 
 
-def test_volunteer_claim_limit(auth_client, sample_volunteer, sample_recipient, app):
+def test_volunteer_claim_limit(auth_client, sample_volunteer, make_delivery):
     """Test volunteer cannot exceed claim limit."""
     # Create 3 deliveries and claim 2
-    with app.app_context():
-        for i in range(3):
-            delivery = Delivery(
-                recipient_id=sample_recipient['recipient_id'],
-                store_name=f'Store {i}',
-                pickup_address=f'{i} Store St',
-                order_name=f'Order {i}',
-                pickup_time=datetime.now() + timedelta(hours=1),
-                status='open'
-            )
-            db.session.add(delivery)
-        db.session.commit()
-        
-        # Get delivery IDs
-        deliveries = Delivery.query.all()
-        delivery_ids = [d.id for d in deliveries]
+    delivery_ids = make_delivery(count=3)
     
-    auth_client.login(sample_volunteer['email'], sample_volunteer['password'])
+    # Claim first two through the service layer; only the claim under test goes over HTTP
+    volunteer = db.session.get(Volunteer, sample_volunteer['volunteer_id'])
+    for delivery_id in delivery_ids[:2]:
+        DeliveryService.claim_delivery(db.session.get(Delivery, delivery_id), volunteer)
     
-    # Claim first two
-    auth_client.client.post(f'/volunteer/request/{delivery_ids[0]}/claim', follow_redirects=True)
-    auth_client.client.post(f'/volunteer/request/{delivery_ids[1]}/claim', follow_redirects=True)
+    auth_client.login(sample_volunteer['email'], sample_volunteer['password'])
     
     # Try to claim third (should fail due to limit)
     response = auth_client.client.post(f'/volunteer/request/{delivery_ids[2]}/claim', follow_redirects=True)
@@ -112,63 +96,158 @@ def test_volunteer_claim_limit(auth_client, sample_volunteer, sample_recipient,
     assert b'already have' in response.data.lower() or b'maximum' in response.data.lower()
 
 
-def test_delivery_completion_flow(auth_client, sample_volunteer, sample_recipient, app):
+def test_delivery_completion_flow(auth_client, sample_volunteer, make_delivery):
     """Test full delivery completion flow."""
     # Create and claim a delivery
-    with app.app_context():
-        delivery = Delivery(
-            recipient_id=sample_recipient['recipient_id'],
-            volunteer_id=sample_volunteer['volunteer_id'],
-            store_name='Complete Store',
-            pickup_address='999 Store Way',
-            order_name='Complete Order',
-            pickup_time=datetime.now() + timedelta(hours=1),
-            status='claimed',
-            claimed_at=datetime.now()
-        )
-        db.session.add(delivery)
-        db.session.commit()
-        delivery_id = delivery.id
+    delivery_id = make_delivery(
+        volunteer_id=sample_volunteer['volunteer_id'],
+        store_name='Complete Store',
+        status='claimed',
+        claimed_at=datetime.now()
+    )
     
     auth_client.login(sample_volunteer['email'], sample_volunteer['password'])
     
     # Mark as picked up
-    response = auth_client.client.post(f'/volunteer/request/{delivery_id}/pickup', follow_redirects=True)
-    assert response.status_code == 200
+    response = auth_client.client.post(f'/volunteer/request/{delivery_id}/pickup')
+    assert response.status_code == 302
+    assert response.location == f'/volunteer/request/{delivery_id}'
     
-    with app.app_context():
-        delivery = Delivery.query.get(delivery_id)
-        assert delivery.status == 'picked_up'
+    delivery = db.session.get(Delivery, delivery_id)
+    assert delivery.status == 'picked_up'
     
     # Mark as complete
-    response = auth_client.client.post(f'/volunteer/request/{delivery_id}/complete', follow_redirects=True)
-    assert response.status_code == 200
+    response = auth_client.client.post(f'/volunteer/request/{delivery_id}/complete')
+    assert response.status_code == 302
+    assert response.location == '/volunteer/dashboard'
     
-    with app.app_context():
-        delivery = Delivery.query.get(delivery_id)
-        assert delivery.status == 'completed'
+    delivery = db.session.get(Delivery, delivery_id)
+    assert delivery.status == 'completed'
 
 
-def test_recipient_can_cancel_delivery(auth_client, sample_recipient, app):
+def test_recipient_can_cancel_delivery(auth_client, sample_recipient, make_delivery):
     """Test recipient can cancel their delivery."""
-    with app.app_context():
-        delivery = Delivery(
-            recipient_id=sample_recipient['recipient_id'],
-            store_name='Cancel Store',
-            pickup_address='111 Cancel St',
-            order_name='Cancel Order',
-            pickup_time=datetime.now() + timedelta(hours=1),
-            status='open'
-        )
-        db.session.add(delivery)
-        db.session.commit()
-        delivery_id = delivery.id
+    delivery_id = make_delivery(store_name='Cancel Store')
     
     auth_client.login(sample_recipient['email'], sample_recipient['password'])
-    response = auth_client.client.post(f'/recipient/request/{delivery_id}/cancel', follow_redirects=True)
+    response = auth_client.client.post(f'/recipient/request/{delivery_id}/cancel')
     
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.location == '/recipient/dashboard'
     
-    with app.app_context():
-        delivery = Delivery.query.get(delivery_id)
+    delivery = db.session.get(Delivery, delivery_id)
+    assert delivery.status == 'canceled'
+
+
+def test_recipient_deletion_cancels_deliveries(sample_recipient, sample_volunteer, make_delivery):
+    """Test deleting a recipient cancels their active deliveries in one batch."""
+    volunteer_id = sample_volunteer['volunteer_id']
+    claimed_at = datetime(2024, 5, 1, 9, 0)
+    open_id = make_delivery()
+    claimed_id = make_delivery(status='claimed', volunteer_id=volunteer_id, claimed_at=claimed_at)
+    picked_up_id = make_delivery(
+        status='picked_up', volunteer_id=volunteer_id,
+        claimed_at=claimed_at, picked_up_at=claimed_at + timedelta(hours=1)
+    )
+    completed_id = make_delivery(status='completed', volunteer_id=volunteer_id, claimed_at=claimed_at)
+    
+    recipient = db.session.get(Recipient, sample_recipient['recipient_id'])
+    delete_recipient_account(recipient)
+    db.session.expire_all()
+    
+    canceled = [db.session.get(Delivery, delivery_id) for delivery_id in (open_id, claimed_id, picked_up_id)]
+    for delivery in canceled:
         assert delivery.status == 'canceled'
+        assert delivery.canceled_by == 'system'
+        assert delivery.volunteer_id is None
+        assert delivery.claimed_at is None
+        assert delivery.picked_up_at is None
+    assert len({delivery.canceled_at for delivery in canceled}) == 1
+    
+    completed = db.session.get(Delivery, completed_id)
+    assert completed.status == 'completed'
+    assert completed.volunteer_id == volunteer_id
+    
+    entries = AuditLog.query.filter_by(action=AuditLog.DELIVERY_CANCELED).order_by(AuditLog.delivery_id).all()
+    assert [entry.delivery_id for entry in entries] == [open_id, claimed_id, picked_up_id]
+    assert [entry.volunteer_id for entry in entries] == [None, volunteer_id, volunteer_id]
+    assert {entry.timestamp for entry in entries} == {canceled[0].canceled_at}
+    assert recipient.deleted_at is not None
+
+
+def available_ids(sample_volunteer):
+    volunteer = db.session.get(Volunteer, sample_volunteer['volunteer_id'])
+    return [delivery.id for delivery in Delivery.get_available_for_volunteer(volunteer)]
+
+
+def test_available_deliveries_radius_boundary(sample_volunteer, make_delivery):
+    """Test stores just inside the radius are listed and just outside are not."""
+    inside_lat, inside_lng = point_at(9.95, 45)
+    outside_lat, outside_lng = point_at(10.05, 45)
+    inside = make_delivery(store_latitude=inside_lat, store_longitude=inside_lng)
+    outside = make_delivery(store_latitude=outside_lat, store_longitude=outside_lng)
+    
+    ids = available_ids(sample_volunteer)
+    assert inside in ids
+    assert outside not in ids
+
+
+def test_available_deliveries_bounding_box(sample_volunteer, make_delivery):
+    """Test the SQL bounding box and the exact distance check both exclude far stores."""
+    min_lat, max_lat, min_lng, max_lng = GeocodingService.bounding_box(
+        SAMPLE_CENTER[0], SAMPLE_CENTER[1], SAMPLE_RADIUS_MILES
+    )
+    lat_extent = max_lat - SAMPLE_CENTER[0]
+    lng_extent = max_lng - SAMPLE_CENTER[1]
+    
+    # Due north, just inside and just outside the box
+    north_inside = make_delivery(store_latitude=SAMPLE_CENTER[0] + 0.99 * lat_extent, store_longitude=SAMPLE_CENTER[1])
+    make_delivery(store_latitude=SAMPLE_CENTER[0] + 1.01 * lat_extent, store_longitude=SAMPLE_CENTER[1])
+    make_delivery(store_latitude=SAMPLE_CENTER[0], store_longitude=SAMPLE_CENTER[1] + 1.01 * lng_extent)
+    # Inside the box's corner but beyond the radius
+    make_delivery(
+        store_latitude=SAMPLE_CENTER[0] + 0.9 * lat_extent,
+        store_longitude=SAMPLE_CENTER[1] + 0.9 * lng_extent
+    )
+    
+    assert available_ids(sample_volunteer) == [north_inside]
+
+
+def test_available_deliveries_recipient_outside_area(sample_volunteer, make_delivery, auth_client):
+    """Test deliveries are excluded when the recipient is outside the area."""
+    far_lat, far_lng = point_at(20, 90)
+    _, recipient_id = auth_client.create_recipient('far@test.com', 'password123')
+    recipient = db.session.get(Recipient, recipient_id)
+    recipient.set_location(far_lat, far_lng)
+    db.session.commit()
+    
+    make_delivery(recipient_id=recipient_id, store_latitude=SAMPLE_CENTER[0], store_longitude=SAMPLE_CENTER[1])
+    
+    assert available_ids(sample_volunteer) == []
+
+
+def test_available_deliveries_order(sample_volunteer, make_delivery):
+    """Test available deliveries are ordered by priority, then oldest first."""
+    now = datetime.utcnow()
+    newer = make_delivery(created_at=now - timedelta(minutes=1))
+    older = make_delivery(created_at=now - timedelta(minutes=10))
+    boosted = make_delivery(created_at=now, priority=5)
+    
+    assert available_ids(sample_volunteer) == [boosted, older, newer]
+
+
+def test_available_deliveries_only_open(sample_volunteer, make_delivery):
+    """Test claimed, picked up, completed and canceled deliveries are not listed."""
+    open_id = make_delivery()
+    for status in ('claimed', 'picked_up', 'completed', 'canceled'):
+        make_delivery(status=status, volunteer_id=sample_volunteer['volunteer_id'])
+    
+    assert available_ids(sample_volunteer) == [open_id]
+
+
+def test_open_priority_index_exists(app):
+    """Test the index backing the available-deliveries ordering is created."""
+    indexes = {index['name']: index for index in inspect(db.engine).get_indexes('deliveries')}
+    
+    assert 'ix_deliveries_open_priority' in indexes
+    assert indexes['ix_deliveries_open_priority']['column_names'] == ['status', 'priority', 'created_at']
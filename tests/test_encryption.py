@@ -0,0 +1,167 @@
+"""Tests for field encryption."""
+import pytest
+from cryptography.fernet import Fernet
+
+from app import db
+from services.encryption_service import EncryptionService
+from tests.conftest import add_recipient
+
+
+TEST_KEY = 'ZmDfcTF7_60GrrY167zsiPd67pEvs0aGOv2oasOM1Pg='
+
+
+@pytest.fixture
+def encryption():
+    """Encryption service with a fixed test key."""
+    return EncryptionService(TEST_KEY)
+
+
+def test_encrypt_round_trip(encryption):
+    """Test values are encrypted with AES-GCM and decrypt back."""
+    token = encryption.encrypt('123 Main St')
+    
+    assert token.startswith(EncryptionService.GCM_PREFIX)
+    assert not encryption.is_legacy(token)
+    assert encryption.decrypt(token) == '123 Main St'
+
+
+def test_encrypt_uses_fresh_nonce(encryption):
+    """Test encrypting the same value twice gives different ciphertexts."""
+    assert encryption.encrypt('123 Main St') != encryption.encrypt('123 Main St')
+
+
+def test_encrypt_empty_value(encryption):
+    """Test empty values are stored as None."""
+    assert encryption.encrypt('') is None
+    assert encryption.encrypt(None) is None
+
+
+def test_decrypt_legacy_fernet(encryption):
+    """Test values written before AES-GCM still decrypt."""
+    token = Fernet(TEST_KEY).encrypt(b'555-0100').decode()
+    
+    assert encryption.is_legacy(token)
+    assert encryption.decrypt(token) == '555-0100'
+
+
+def test_decrypt_tampered_token(encryption):
+    """Test a modified AES-GCM token fails authentication."""
+    token = encryption.encrypt('123 Main St')
+    tampered = token[:-6] + ('A' if token[-6] != 'A' else 'B') + token[-5:]
+    
+    assert encryption.decrypt(tampered) is None
+
+
+def test_decrypt_wrong_key(encryption):
+    """Test tokens from another key are rejected."""
+    other = EncryptionService(EncryptionService.generate_key())
+    
+    assert encryption.decrypt(other.encrypt('123 Main St')) is None
+    assert encryption.decrypt(Fernet(Fernet.generate_key()).encrypt(b'x').decode()) is None
+
+
+@pytest.mark.parametrize('value', [
+    None,
+    '',
+    '[PURGED]',
+    'not a token',
+    'g1:short',
+    'gAAAAA' + '!' * 80,
+    b'\xff\xfe garbage',
+])
+def test_decrypt_malformed(encryption, value):
+    """Test empty, purged and malformed values decrypt to None."""
+    assert encryption.decrypt(value) is None
+
+
+def test_decrypt_cache(encryption):
+    """Test repeat decrypts of a stored value are served from the cache."""
+    token = encryption.encrypt('123 Main St')
+    
+    assert encryption.decrypt(token) == '123 Main St'
+    assert encryption.decrypt(token) == '123 Main St'
+    
+    info = encryption._decrypt_token.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert info.maxsize == EncryptionService.DECRYPT_CACHE_SIZE
+
+
+def test_decrypt_cache_skips_failures(encryption):
+    """Test invalid tokens are not cached."""
+    token = encryption.encrypt('123 Main St')
+    tampered = token[:-6] + ('A' if token[-6] != 'A' else 'B') + token[-5:]
+    
+    encryption.decrypt(tampered)
+    encryption.decrypt(tampered)
+    
+    assert encryption._decrypt_token.cache_info().currsize == 0
+
+
+def test_set_contact_single_ciphertext(encryption):
+    """Test address and notes are stored only in the combined field."""
+    recipient = add_recipient('contact@test.com', 'password123')
+    recipient.set_contact('123 Main St', 'Gate code 42', encryption)
+    
+    assert recipient.address_encrypted == '[CONTACT]'
+    assert recipient.notes_encrypted is None
+    assert recipient.contact_encrypted.startswith(EncryptionService.GCM_PREFIX)
+    assert recipient.get_contact(encryption) == ('123 Main St', 'Gate code 42')
+    assert recipient.get_address(encryption) == '123 Main St'
+    assert recipient.get_notes(encryption) == 'Gate code 42'
+
+
+def test_get_contact_fallback(encryption):
+    """Test rows without the combined field read the separate columns."""
+    recipient = add_recipient('contact@test.com', 'password123')
+    recipient.address_encrypted = encryption.encrypt('123 Main St')
+    recipient.notes_encrypted = encryption.encrypt('Gate code 42')
+    
+    assert recipient.get_contact(encryption) == ('123 Main St', 'Gate code 42')
+
+
+def test_set_address_keeps_notes(encryption):
+    """Test updating the address alone keeps the notes."""
+    recipient = add_recipient('contact@test.com', 'password123')
+    recipient.set_contact('123 Main St', 'Gate code 42', encryption)
+    recipient.set_address('456 Oak Ave', encryption)
+    
+    assert recipient.get_contact(encryption) == ('456 Oak Ave', 'Gate code 42')
+    
+    recipient.set_notes(None, encryption)
+    assert recipient.get_contact(encryption) == ('456 Oak Ave', None)
+
+
+def test_get_contact_unreadable_combined(encryption):
+    """Test an undecryptable combined field falls back to the separate columns."""
+    recipient = add_recipient('contact@test.com', 'password123')
+    recipient.address_encrypted = encryption.encrypt('123 Main St')
+    recipient.contact_encrypted = 'garbage'
+    
+    assert recipient.get_contact(encryption) == ('123 Main St', None)
+
+
+def test_reencrypt_data_moves_contact(app, runner, encryption, monkeypatch):
+    """Test `flask reencrypt-data` moves legacy address and notes into the combined field."""
+    monkeypatch.setitem(app.extensions, 'encryption', encryption)
+    legacy = Fernet(TEST_KEY)
+    
+    recipient = add_recipient('legacy@test.com', 'password123')
+    recipient.address_encrypted = legacy.encrypt(b'123 Main St').decode()
+    recipient.notes_encrypted = legacy.encrypt(b'Gate code 42').decode()
+    recipient.phone_encrypted = legacy.encrypt(b'555-0100').decode()
+    purged = add_recipient('purged@test.com', 'password123')
+    purged.address_encrypted = '[PURGED]'
+    db.session.commit()
+    
+    result = runner.invoke(args=['reencrypt-data'])
+    
+    assert result.exit_code == 0
+    assert 'Updated 2 encrypted fields.' in result.output
+    assert recipient.address_encrypted == '[CONTACT]'
+    assert recipient.notes_encrypted is None
+    assert recipient.get_contact(encryption) == ('123 Main St', 'Gate code 42')
+    assert not encryption.is_legacy(recipient.phone_encrypted)
+    assert recipient.get_phone(encryption) == '555-0100'
+    assert purged.address_encrypted == '[PURGED]'
+    assert purged.contact_encrypted is None
@@ -0,0 +1,165 @@
+"""Tests for geocoding and service-area checks."""
+import random
+
+import pytest
+import requests
+
+from services.geocoding_service import GeocodingService
+from tests.conftest import SAMPLE_CENTER, SAMPLE_RADIUS_MILES, point_at
+
+
+@pytest.fixture
+def service_area(app, monkeypatch):
+    """Use the sample service area for the app-wide service-area checks."""
+    monkeypatch.setitem(app.config, 'SERVICE_AREA_CENTER_LAT', SAMPLE_CENTER[0])
+    monkeypatch.setitem(app.config, 'SERVICE_AREA_CENTER_LNG', SAMPLE_CENTER[1])
+    monkeypatch.setitem(app.config, 'SERVICE_AREA_RADIUS_MILES', SAMPLE_RADIUS_MILES)
+
+
+@pytest.mark.parametrize('bearing', [0, 45, 90, 135, 180, 225, 270, 315])
+def test_service_area_radius_boundary(service_area, bearing):
+    """Test points just inside the radius are accepted and just outside are not."""
+    assert GeocodingService.is_within_service_area(*point_at(SAMPLE_RADIUS_MILES - 0.01, bearing))
+    assert not GeocodingService.is_within_service_area(*point_at(SAMPLE_RADIUS_MILES + 0.01, bearing))
+
+
+def test_service_area_box_corner(service_area):
+    """Test a point inside the bounding box but outside the circle is rejected."""
+    min_lat, max_lat, min_lng, max_lng = GeocodingService.bounding_box(
+        SAMPLE_CENTER[0], SAMPLE_CENTER[1], SAMPLE_RADIUS_MILES
+    )
+    latitude = SAMPLE_CENTER[0] + 0.9 * (max_lat - SAMPLE_CENTER[0])
+    longitude = SAMPLE_CENTER[1] + 0.9 * (max_lng - SAMPLE_CENTER[1])
+    
+    assert min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng
+    assert GeocodingService.calculate_distance(SAMPLE_CENTER[0], SAMPLE_CENTER[1], latitude, longitude) > SAMPLE_RADIUS_MILES
+    assert not GeocodingService.is_within_service_area(latitude, longitude)
+
+
+def test_service_area_matches_distance(service_area):
+    """Test the box and squared-chord checks agree with calculate_distance."""
+    rng = random.Random(0)
+    for _ in range(2000):
+        # Spread over twice the box so both prefilter branches are exercised
+        latitude = SAMPLE_CENTER[0] + rng.uniform(-0.3, 0.3)
+        longitude = SAMPLE_CENTER[1] + rng.uniform(-0.4, 0.4)
+        distance = GeocodingService.calculate_distance(SAMPLE_CENTER[0], SAMPLE_CENTER[1], latitude, longitude)
+        if abs(distance - SAMPLE_RADIUS_MILES) < 1e-9:
+            continue
+        
+        assert GeocodingService.is_within_service_area(latitude, longitude) == (distance <= SAMPLE_RADIUS_MILES)
+
+
+def test_service_area_uses_configured_radius(service_area, app, monkeypatch):
+    """Test changing the configured radius changes the cached threshold used."""
+    point = point_at(15, 90)
+    assert not GeocodingService.is_within_service_area(*point)
+    
+    monkeypatch.setitem(app.config, 'SERVICE_AREA_RADIUS_MILES', 20)
+    assert GeocodingService.is_within_service_area(*point)
+
+
+class FakeResponse:
+    """Stand-in for a requests response carrying a JSON body."""
+    
+    def __init__(self, data):
+        self.data = data
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Stand-in for the pooled requests session, replaying queued responses."""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+    
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return FakeResponse(response)
+
+
+PLACE_OK = {
+    'status': 'OK',
+    'result': {
+        'name': 'Test Market',
+        'formatted_address': '1 Market St, Sacramento, CA',
+        'geometry': {'location': {'lat': 38.58, 'lng': -121.49}},
+        'types': ['supermarket', 'store'],
+        'place_id': 'place-1'
+    }
+}
+
+GEOCODE_OK = {
+    'status': 'OK',
+    'results': [{
+        'formatted_address': '1 Market St, Sacramento, CA',
+        'geometry': {'location': {'lat': 38.58, 'lng': -121.49}}
+    }]
+}
+
+
+@pytest.fixture
+def google_api(app, monkeypatch):
+    """Configure a Google API key and route requests to a FakeSession; returns a setter."""
+    monkeypatch.setitem(app.config, 'GOOGLE_PLACES_API_KEY', 'test-key')
+    GeocodingService._fetch_place_details.cache_clear()
+    GeocodingService._fetch_geocode.cache_clear()
+    
+    def respond(*responses):
+        session = FakeSession(*responses)
+        monkeypatch.setattr(GeocodingService, '_get_session', classmethod(lambda cls: session))
+        return session
+    
+    yield respond
+    GeocodingService._fetch_place_details.cache_clear()
+    GeocodingService._fetch_geocode.cache_clear()
+
+
+def test_place_details_cached_copy(google_api):
+    """Test callers can't change the cached place details through the returned dict."""
+    session = google_api(PLACE_OK)
+    
+    details = GeocodingService.get_place_details('place-1')
+    details['types'].append('pharmacy')
+    details['name'] = 'Changed'
+    
+    again = GeocodingService.get_place_details('place-1')
+    assert again['types'] == ['supermarket', 'store']
+    assert again['name'] == 'Test Market'
+    assert len(session.calls) == 1
+
+
+@pytest.mark.parametrize('failure', [
+    {'status': 'NOT_FOUND'},
+    requests.ConnectionError('connection reset'),
+])
+def test_place_details_failure_not_cached(google_api, failure):
+    """Test a failed place lookup returns None and is retried next time."""
+    session = google_api(failure, PLACE_OK)
+    
+    assert GeocodingService.get_place_details('place-1') is None
+    assert GeocodingService.get_place_details('place-1')['place_id'] == 'place-1'
+    assert len(session.calls) == 2
+
+
+@pytest.mark.parametrize('failure', [
+    {'status': 'ZERO_RESULTS', 'results': []},
+    requests.Timeout('read timed out'),
+])
+def test_geocode_failure_not_cached(google_api, failure):
+    """Test a failed geocode returns None and is retried next time, while successes are cached."""
+    session = google_api(failure, GEOCODE_OK)
+    
+    assert GeocodingService.geocode_address('1 Market St') is None
+    assert GeocodingService.geocode_address('1 Market St')['latitude'] == 38.58
+    assert GeocodingService.geocode_address('1  market st')['latitude'] == 38.58
+    assert len(session.calls) == 2
@@ -0,0 +1,215 @@
+"""Tests for background jobs and notification emails."""
+import threading
+from datetime import timedelta
+
+import pytest
+import resend
+from flask import g
+
+from app import db
+from models.recipient import Recipient
+from services.cleanup_service import delete_recipient_account
+from services.notification_service import NotificationService
+from services.task_queue import TaskQueue, enqueue
+from tests.conftest import FUTURE_PICKUP
+
+FROM_EMAIL = 'Community Delivery <noreply@yourdomain.com>'
+
+
+@pytest.fixture
+def task_queue(app):
+    """Background task runner registered on the app for one test."""
+    task_queue = TaskQueue(app)
+    yield task_queue
+    task_queue.stop()
+    app.extensions.pop('task_queue', None)
+
+
+@pytest.fixture
+def sent_emails(app, monkeypatch):
+    """Configure Resend and record the payloads sent to it instead of sending."""
+    monkeypatch.setitem(app.config, 'RESEND_API_KEY', 're_test')
+    monkeypatch.setattr(resend, 'api_key', None)
+    sent = {'single': [], 'batch': []}
+    
+    def send(params):
+        sent['single'].append(params)
+        return {'id': f'email-{len(sent["single"])}'}
+    
+    def send_batch(params):
+        sent['batch'].append(params)
+        return {'data': [{'id': f'batch-{i}'} for i in range(len(params))]}
+    
+    monkeypatch.setattr(resend.Emails, 'send', send)
+    monkeypatch.setattr(resend.Batch, 'send', send_batch)
+    return sent
+
+
+def test_enqueue_runs_inline_when_disabled():
+    """Test jobs run immediately in the caller's app context without a task queue."""
+    calls = []
+    g.marker = 'request'
+    
+    def job(value, key=None):
+        calls.append((value, key, g.get('marker'), threading.current_thread().name))
+    
+    enqueue(job, 1, key='a')
+    
+    assert calls == [(1, 'a', 'request', threading.current_thread().name)]
+
+
+def test_enqueue_runs_in_background(task_queue):
+    """Test queued jobs run in order on the worker thread in their own app context."""
+    calls = []
+    g.marker = 'request'
+    
+    def job(value, key=None):
+        calls.append((value, key, g.get('marker'), threading.current_thread().name))
+    
+    enqueue(job, 1, key='a')
+    enqueue(job, 2)
+    task_queue.stop()
+    
+    assert calls == [(1, 'a', None, 'task-queue'), (2, None, None, 'task-queue')]
+
+
+def test_enqueue_logs_failures(app, monkeypatch):
+    """Test a failing inline job is logged instead of raised."""
+    errors = []
+    monkeypatch.setattr(app.logger, 'error', errors.append)
+    
+    def failing_job():
+        raise RuntimeError('boom')
+    
+    enqueue(failing_job)
+    
+    assert errors == [f'Background task {failing_job.__qualname__} failed: boom']
+
+
+def test_task_queue_survives_failures(app, task_queue, monkeypatch):
+    """Test a failing background job is logged and later jobs still run."""
+    errors = []
+    calls = []
+    monkeypatch.setattr(app.logger, 'error', errors.append)
+    
+    def failing_job():
+        raise RuntimeError('boom')
+    
+    enqueue(failing_job)
+    enqueue(calls.append, 'after')
+    task_queue.stop()
+    
+    assert errors == [f'Background task {failing_job.__qualname__} failed: boom']
+    assert calls == ['after']
+
+
+def test_recipient_deletion_emails_each_volunteer_once(sample_recipient, sample_volunteer, make_delivery,
+                                                       auth_client, sent_emails):
+    """Test each affected volunteer gets one email listing their canceled deliveries, sent as one batch."""
+    volunteer_id = sample_volunteer['volunteer_id']
+    _, other_volunteer_id = auth_client.create_volunteer('other@test.com', 'password123', 'Other Volunteer')
+    make_delivery(status='claimed', volunteer_id=volunteer_id, store_name='Store A')
+    make_delivery(
+        status='picked_up', volunteer_id=volunteer_id, store_name='Store B',
+        pickup_time=FUTURE_PICKUP + timedelta(hours=2)
+    )
+    make_delivery(status='claimed', volunteer_id=other_volunteer_id, store_name='Store C')
+    make_delivery(store_name='Store D')  # open, no volunteer to tell
+    
+    delete_recipient_account(db.session.get(Recipient, sample_recipient['recipient_id']))
+    
+    assert sent_emails['single'] == []
+    assert len(sent_emails['batch']) == 1
+    single, grouped = sorted(sent_emails['batch'][0], key=lambda email: email['to'])
+    
+    assert grouped == {
+        'from': FROM_EMAIL,
+        'to': ['volunteer@test.com'],
+        'subject': 'Deliveries canceled - Recipient account closed',
+        'text': NotificationService.render_template(
+            'deliveries_canceled_account_deleted',
+            volunteer_name='Test Volunteer',
+            deliveries=[
+                {'store_name': 'Store A', 'pickup_time': 'January 01, 2099 at 12:00 PM'},
+                {'store_name': 'Store B', 'pickup_time': 'January 01, 2099 at 02:00 PM'}
+            ]
+        )[1]
+    }
+    assert '2 deliveries you claimed have been automatically canceled' in grouped['text']
+    assert '- Store: Store B, was scheduled for: January 01, 2099 at 02:00 PM' in grouped['text']
+    
+    assert single == {
+        'from': FROM_EMAIL,
+        'to': ['other@test.com'],
+        'subject': 'Delivery canceled - Recipient account closed',
+        'text': NotificationService.render_template(
+            'delivery_canceled_account_deleted',
+            volunteer_name='Other Volunteer',
+            store_name='Store C',
+            pickup_time='January 01, 2099 at 12:00 PM'
+        )[1]
+    }
+
+
+def test_send_emails_batch_chunks(sent_emails):
+    """Test batch sends are split into requests of at most 100 emails."""
+    messages = [(f'user{i}@test.com', f'Subject {i}', f'Body {i}') for i in range(250)]
+    
+    assert NotificationService.send_emails_batch(messages) == 250
+    
+    assert [len(batch) for batch in sent_emails['batch']] == [100, 100, 50]
+    assert sent_emails['batch'][2][-1] == {
+        'from': FROM_EMAIL,
+        'to': ['user249@test.com'],
+        'subject': 'Subject 249',
+        'text': 'Body 249'
+    }
+    assert sent_emails['single'] == []
+
+
+def test_send_emails_batch_single_message(sent_emails):
+    """Test a one-message batch uses the single-email endpoint."""
+    assert NotificationService.send_emails_batch([('user@test.com', 'Subject', 'Body')]) == 1
+    
+    assert sent_emails['single'] == [{
+        'from': FROM_EMAIL,
+        'to': ['user@test.com'],
+        'subject': 'Subject',
+        'text': 'Body'
+    }]
+    assert sent_emails['batch'] == []
+
+
+def test_batching_collects_emails(sent_emails):
+    """Test send_email calls inside batching(), even nested, go out in one batch on exit."""
+    with NotificationService.batching():
+        assert NotificationService.send_email('a@test.com', 'A', 'Body A')
+        with NotificationService.batching():
+            NotificationService.send_email('b@test.com', 'B', 'Body B')
+        assert sent_emails['batch'] == []
+    
+    assert sent_emails['single'] == []
+    assert [[email['to'] for email in batch] for batch in sent_emails['batch']] == [[['a@test.com'], ['b@test.com']]]
+
+
+def test_batch_send_without_resend(app, monkeypatch):
+    """Test nothing is sent and the skip is logged when Resend isn't configured."""
+    monkeypatch.setitem(app.config, 'RESEND_API_KEY', None)
+    logged = []
+    monkeypatch.setattr(app.logger, 'info', logged.append)
+    
+    def fail(params):
+        raise AssertionError('Resend should not be called')
+    
+    monkeypatch.setattr(resend.Emails, 'send', fail)
+    monkeypatch.setattr(resend.Batch, 'send', fail)
+    
+    messages = [('a@test.com', 'A', 'Body A'), ('b@test.com', 'B', 'Body B')]
+    assert NotificationService.send_emails_batch(messages) == 0
+    with NotificationService.batching():
+        assert NotificationService.send_email('a@test.com', 'A', 'Body A') is False
+    
+    assert logged == [
+        '[NOTIFICATION - NOT SENT - Resend not configured] 2 emails',
+        '[NOTIFICATION - NOT SENT - Resend not configured] To: a@test.com, Subject: A'
+    ]
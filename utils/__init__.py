@@ -0,0 +1 @@
+# Small dependency-free helpers shared by models and services
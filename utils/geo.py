@@ -0,0 +1,17 @@
+import math
+
+
+def fuzz_coordinates(latitude, longitude, decimals=2):
+    """
+    Round coordinates for privacy-preserving storage.
+    2 decimal places ≈ 0.7 mile accuracy.
+    """
+    if latitude is None or longitude is None:
+        return None, None
+    
+    # floor(x * scale + 0.5) rounds half up; much cheaper than round(x, n)
+    scale = 100 if decimals == 2 else 10 ** decimals
+    return (
+        math.floor(float(latitude) * scale + 0.5) / scale,
+        math.floor(float(longitude) * scale + 0.5) / scale
+    )